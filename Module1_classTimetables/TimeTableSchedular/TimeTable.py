@@ -1,12 +1,54 @@
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Callable
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from collections import Counter
+import multiprocessing
 import random
+import time
+import hashlib
+import io
+import zipfile
 from openpyxl import Workbook # type: ignore
+from openpyxl.cell import WriteOnlyCell # type: ignore
 from openpyxl.styles import PatternFill, Border, Side, Alignment, Font # type: ignore
 from openpyxl.utils import get_column_letter # type: ignore
 import json
 
+# Slot type codes stored in the occupancy grid
+FREE, THEORY, LAB, MAKEUP, BREAK = range(5)
+SLOT_TYPES = {THEORY: 'theory', LAB: 'lab', MAKEUP: 'makeup', BREAK: 'break'}
+
+# Export styles, shared by every cell of every workbook
+HEADER_FILL = PatternFill(start_color="CCE5FF", end_color="CCE5FF", fill_type="solid")
+SLOT_FILLS = {
+    THEORY: PatternFill(start_color="E6F3FF", end_color="E6F3FF", fill_type="solid"),
+    LAB: PatternFill(start_color="FFE6E6", end_color="FFE6E6", fill_type="solid"),
+    BREAK: PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid"),
+    MAKEUP: PatternFill(start_color="E6FFE6", end_color="E6FFE6", fill_type="solid")
+}
+BORDER = Border(left=Side(style='thin'), right=Side(style='thin'),
+                top=Side(style='thin'), bottom=Side(style='thin'))
+CENTER_ALIGNED = Alignment(horizontal='center', vertical='center', wrap_text=True)
+HEADER_FONT = Font(bold=True)
+TITLE_FONT = Font(bold=True, size=14)
+
+# Chunks of restarts per worker in TimeTable.parallel_restarts; each one
+# finished reports progress
+RESTART_CHUNKS_PER_WORKER = 16
+
+# Strategies raced by TimeTable.run_portfolio: restarts suit loose inputs,
+# repair and systematic search the tight ones
+PORTFOLIO_STRATEGIES = [
+    {'name': 'restarts', 'mode': 'greedy', 'num_iterations': 1000},
+    {'name': 'repair', 'mode': 'repair', 'num_iterations': 200},
+    {'name': 'search', 'mode': 'search', 'max_nodes': 100000}
+]
+
 class TimeTable:
-    def __init__(self, sections=None, courses=None, theory_rooms=None, lab_rooms=None):
+    def __init__(self, sections=None, courses=None, theory_rooms=None, lab_rooms=None,
+                 instructors=None, room_details=None, course_details=None, section_sizes=None,
+                 assigned_instructors=None):
         self.sections = sections or ['CSE-A', 'CSE-B', 'CSE-C', 'CSE-D', 'CSE-E']
         self.days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
         self.hours_per_day = 8
@@ -22,6 +64,7 @@ class TimeTable:
         }
 
         self.max_consecutive_lectures = 2
+        self.max_daily_lectures = 2
         self.min_lectures_per_subject = 2
 
         self.consecutive_slots = {
@@ -35,80 +78,420 @@ class TimeTable:
         self.theory_rooms = theory_rooms or ['Room101', 'Room102', 'Room103', 'Room104', 'Room105']
         self.lab_rooms = lab_rooms or ['Lab101', 'Lab102', 'Lab103', 'Lab104', 'Lab105']
         
+        # Integer codes for sections, rooms and course names
+        self.section_ids = {section: i for i, section in enumerate(self.sections)}
+        self.rooms = self.theory_rooms + self.lab_rooms
+        self.room_ids = {room: i for i, room in enumerate(self.rooms)}
+        self.theory_room_ids = [self.room_ids[room] for room in self.theory_rooms]
+        self.lab_room_ids = [self.room_ids[room] for room in self.lab_rooms]
+        self.course_names: List[str] = []
+        self.course_ids: Dict[str, int] = {}
+        # course_rule[cid]: the course whose daily rules and instructor a session follows
+        self.course_rule: List[int] = []
+        self.break_course = self.course_id('Break')
+        # Intern scheduled course names up front so ids agree across processes
+        for course, hours in self.courses.items():
+            self.course_id(course)
+            if hours['lab'] > 0:
+                self.course_id(f"{course}Lab")
+        for course, hours in self.courses.items():
+            derived = [f"{course} Makeup Class", f"{course} Makeup Lab"]
+            if hours['lab'] > 0:
+                derived.append(f"{course}Lab")
+            for name in derived:
+                self.course_rule[self.course_id(name)] = self.course_ids[course]
+
+        # window_masks[duration][hour] -> bits hour .. hour + duration - 1
+        self.window_masks = [
+            [((1 << duration) - 1) << hour for hour in range(self.hours_per_day)]
+            for duration in range(self.hours_per_day + 1)
+        ]
+        self.break_mask = 1 << self.break_hour
+
+        # Window lengths kept in the free-room index: single hours and lab blocks
+        self.window_durations = (1, 3)
+        self.theory_room_bits = sum(1 << rid for rid in self.theory_room_ids)
+        self.lab_room_bits = sum(1 << rid for rid in self.lab_room_ids)
+
+        # Optional hard constraints: instructor clashes and availability, room capacity.
+        # Instructor, Room and Course objects from `classes` or their to_dict() forms
+        self.instructors = [self.plain(instructor) for instructor in instructors or []]
+        self.room_details = [self.plain(room) for room in room_details or []]
+        self.course_details = {
+            course['name']: course for course in map(self.plain, course_details or [])
+        }
+        self.section_sizes = dict(section_sizes or {})
+        # [section, course, instructor id] kept from an earlier timetable (see
+        # instructor_assignments); a pair keeps its instructor while still a candidate
+        self.assigned_instructors = [list(item) for item in assigned_instructors or []]
+
+        # Time slot t of the classes package is teaching hour t, skipping the break
+        self.teaching_hours = [hour for hour in range(self.hours_per_day) if hour != self.break_hour]
+        self.instructor_ids = {instructor['id']: i for i, instructor in enumerate(self.instructors)}
+        self.instructor_unavailable = [
+            self.unavailable_mask(instructor.get('availability') or [])
+            for instructor in self.instructors
+        ]
+        details = {room['name']: room for room in self.room_details}
+        self.room_capacity = [details.get(room, {}).get('capacity') for room in self.rooms]
+        self.room_unavailable = [
+            self.unavailable_mask(details.get(room, {}).get('availability') or {})
+            for room in self.rooms
+        ]
+
+        # Rooms of each kind sorted by capacity, with the bitmask of every suffix,
+        # so the rooms seating at least n students are one bisection away
+        self.capacity_index = {}
+        for is_lab, room_ids in ((False, self.theory_room_ids), (True, self.lab_room_ids)):
+            ordered = sorted(room_ids, key=self.seats)
+            suffix_bits = [0] * (len(ordered) + 1)
+            for i in range(len(ordered) - 1, -1, -1):
+                suffix_bits[i] = suffix_bits[i + 1] | 1 << ordered[i]
+            self.capacity_index[is_lab] = ([self.seats(rid) for rid in ordered], suffix_bits)
+        self.assign_resources()
+
+        # Gap count and distribution score for every possible day of class hours
+        day_masks = range(1 << self.hours_per_day)
+        self.gap_table = [self.slot_gaps(self.mask_hours(mask)) for mask in day_masks]
+        self.distribution_table = [self.slot_distribution(self.mask_hours(mask)) for mask in day_masks]
+        self.day_score_table = [
+            self.distribution_table[mask] - self.gap_table[mask] * 10
+            for mask in day_masks
+        ]
+
+        # Random choices of this timetable's runs; seeding it leaves other
+        # timetables, e.g. in concurrent jobs, undisturbed
+        self.random = random.Random()
+
         self.initialize_timetable()
+        # Sheets of the last export, reused for sections that have not changed since
+        self.export_cache: Optional[Dict] = None
+        # (timetable id, placements, course count) as last written by
+        # TimeTableDatabase.save, which then writes only what changed since
+        self.saved_rows: Optional[Tuple[str, frozenset, int]] = None
         self.monte_carlo_stats = {
             'total_attempts': 0,
             'successful_attempts': 0,
             'failed_attempts': 0
         }
 
+    def input_config(self) -> Dict:
+        return {
+            'sections': list(self.sections),
+            'courses': self.courses,
+            'theory_rooms': list(self.theory_rooms),
+            'lab_rooms': list(self.lab_rooms),
+            'instructors': self.instructors,
+            'room_details': self.room_details,
+            'course_details': list(self.course_details.values()),
+            'section_sizes': self.section_sizes,
+            'assigned_instructors': self.instructor_assignments()
+        }
+
+    def course_id(self, name: str) -> int:
+        cid = self.course_ids.get(name)
+        if cid is None:
+            cid = len(self.course_names)
+            self.course_names.append(name)
+            self.course_ids[name] = cid
+            self.course_rule.append(cid)
+        return cid
+
+    @staticmethod
+    def plain(item) -> Dict:
+        return item.to_dict() if hasattr(item, 'to_dict') else dict(item)
+
+    def unavailable_mask(self, availability) -> int:
+        # Hours whose time slot is marked unavailable; a list or a {slot: bool} dict
+        slots = availability.items() if isinstance(availability, dict) else enumerate(availability)
+        mask = 0
+        for slot, available in slots:
+            slot = int(slot)
+            if not available and 0 <= slot < len(self.teaching_hours):
+                mask |= 1 << self.teaching_hours[slot]
+        return mask
+
+    def seats(self, room_id: int) -> float:
+        # Rooms without a known capacity fit any section
+        capacity = self.room_capacity[room_id]
+        return float('inf') if capacity is None else capacity
+
+    def rooms_with_capacity(self, is_lab: bool, size: int) -> int:
+        capacities, suffix_bits = self.capacity_index[is_lab]
+        return suffix_bits[bisect_left(capacities, size)]
+
+    def assign_resources(self):
+        # Allowed rooms of every (section, course) session and the instructor of every
+        # (section, course) pair, one per pair, chosen to balance teaching hours.
+        # Courses, sections and instructors are taken in name order, so the same
+        # input in any order gets the same instructors. Pairs listed in
+        # assigned_instructors keep theirs; only the others are balanced
+        self.session_rooms: Dict[Tuple[int, int], int] = {}
+        self.session_instructor: Dict[Tuple[int, int], int] = {}
+        load = [0] * len(self.instructors)
+        available = [
+            len(self.days) * sum(1 for hour in self.teaching_hours if not busy >> hour & 1)
+            for busy in self.instructor_unavailable
+        ]
+        all_rooms = (1 << len(self.rooms)) - 1
+        kept = {(section, course): instructor for section, course, instructor in self.assigned_instructors}
+        pending = []
+        for course, hours in sorted(self.courses.items()):
+            details = self.course_details.get(course, {})
+            course_rooms = [self.room_ids[room] for room in details.get('rooms') or []
+                            if room in self.room_ids]
+            course_bits = sum(1 << rid for rid in course_rooms) if course_rooms else all_rooms
+            candidates = [self.instructor_ids[instructor]
+                          for instructor in sorted(details.get('instructors') or [], key=str)
+                          if instructor in self.instructor_ids]
+
+            cid = self.course_ids[course]
+            sessions = [(cid, False)]
+            if hours['lab'] > 0:
+                sessions.append((self.course_ids[f"{course}Lab"], True))
+            for section in sorted(self.sections):
+                sid = self.section_ids[section]
+                size = self.section_sizes.get(section, 0)
+                for session, is_lab in sessions:
+                    self.session_rooms[(sid, session)] = self.rooms_with_capacity(is_lab, size) & course_bits
+                iid = self.instructor_ids.get(kept.get((section, course)))
+                if iid in candidates:
+                    load[iid] += self.weekly_hours(course)
+                    self.session_instructor[(sid, cid)] = iid
+                elif candidates:
+                    pending.append((sid, cid, candidates, self.weekly_hours(course)))
+
+        for sid, cid, candidates, weekly in pending:
+            # Least loaded relative to the hours the instructor is available
+            iid = min(candidates, key=lambda i: (load[i] + weekly) / max(available[i], 1))
+            load[iid] += weekly
+            self.session_instructor[(sid, cid)] = iid
+
+    def weekly_hours(self, course: str) -> int:
+        # Teaching hours of one section of the course: its lectures plus one 3-hour lab block
+        hours = self.courses[course]
+        return hours['theory'] + (3 if hours['lab'] > 0 else 0)
+
+    def instructor_assignments(self) -> List[List[str]]:
+        # [section, course, instructor id] of every pair with an instructor, by name
+        return sorted(
+            [self.sections[sid], self.course_names[cid], self.instructors[iid]['id']]
+            for (sid, cid), iid in self.session_instructor.items()
+        )
+
+    def allowed_rooms(self, section_id: int, course_id: int, is_lab: bool) -> int:
+        # Bitmask of rooms of the right kind and size for the section's course
+        bits = self.session_rooms.get((section_id, course_id))
+        if bits is None:
+            bits = self.rooms_with_capacity(is_lab, self.section_sizes.get(self.sections[section_id], 0))
+        return bits
+
+    def instructor_of(self, section_id: int, course_id: int) -> Optional[int]:
+        return self.session_instructor.get((section_id, self.course_rule[course_id]))
+
+    def instructor_busy(self, section_id: int, course_id: int, day: int) -> int:
+        iid = self.instructor_of(section_id, course_id)
+        return 0 if iid is None else self.instructor_mask[iid][day]
+
+    def cell(self, section_id: int, day: int, hour: int) -> int:
+        return (section_id * len(self.days) + day) * self.hours_per_day + hour
+
     def initialize_timetable(self):
-        self.timetable = {
-            section: {
-                day: [None for _ in range(self.hours_per_day)]
-                for day in range(len(self.days))
-            }
-            for section in self.sections
+        num_days = len(self.days)
+        num_cells = len(self.sections) * num_days * self.hours_per_day
+        
+        # Per-(section, day) and per-(room, day) occupancy bitmasks
+        self.section_mask = [[0] * num_days for _ in self.sections]
+        # Unavailable hours start out busy, like the break in the section masks
+        self.room_mask = [[busy] * num_days for busy in self.room_unavailable]
+        self.instructor_mask = [[busy] * num_days for busy in self.instructor_unavailable]
+
+        # free_rooms[duration][day][start]: bitmask of rooms free for the whole window
+        self.free_rooms = {
+            duration: [
+                [sum(1 << rid for rid, busy in enumerate(self.room_unavailable)
+                     if not busy & self.window_masks[duration][start])
+                 if start + duration <= self.hours_per_day else 0
+                 for start in range(self.hours_per_day)]
+                for _ in range(num_days)
+            ]
+            for duration in self.window_durations
         }
+
+        # course_mask[section][day][course]: hours the course holds that day
+        self.course_mask: List[List[Dict[int, int]]] = [[{} for _ in range(num_days)] for _ in self.sections]
+
+        # Theory/lab hours per (section, day) and the running score they give
+        self.class_mask = [[0] * num_days for _ in self.sections]
+        self.score = 0
+        self.placements: List[Tuple] = []
         
-        self.room_schedule = {
-            room: {
-                day: [False] * self.hours_per_day
+        # Flat cell arrays: course id, room id and slot type of every hour
+        self.cell_course = array('h', [-1]) * num_cells
+        self.cell_room = array('h', [-1]) * num_cells
+        self.cell_type = array('b', [FREE]) * num_cells
+        
+        self._set_break_time()
+
+    def _set_break_time(self):
+        for sid in range(len(self.sections)):
+            for day in range(len(self.days)):
+                i = self.cell(sid, day, self.break_hour)
+                self.cell_course[i] = self.break_course
+                self.cell_type[i] = BREAK
+                self.section_mask[sid][day] |= self.break_mask
+                self.course_mask[sid][day][self.break_course] = self.break_mask
+
+    def slot_view(self, i: int) -> Optional[Dict]:
+        slot_type = self.cell_type[i]
+        if slot_type == FREE:
+            return None
+        if slot_type == BREAK:
+            return {'course': 'Break', 'room': 'Break', 'type': 'break'}
+        return {
+            'course': self.course_names[self.cell_course[i]],
+            'room': self.rooms[self.cell_room[i]],
+            'type': SLOT_TYPES[slot_type]
+        }
+
+    @property
+    def timetable(self) -> Dict:
+        # String-keyed view of the grid, built on demand for export
+        return {
+            section: {
+                day: [self.slot_view(self.cell(sid, day, hour))
+                      for hour in range(self.hours_per_day)]
                 for day in range(len(self.days))
             }
-            for room in (self.theory_rooms + self.lab_rooms)
+            for sid, section in enumerate(self.sections)
         }
-        
-        for section in self.sections:
-            for day in range(len(self.days)):
-                self.timetable[section][day][self.break_hour] = {
-                    'course': 'Break',
-                    'room': 'Break',
-                    'type': 'break'
-                }
-        
-        self.room_schedule = {
+
+    @property
+    def room_schedule(self) -> Dict:
+        return {
             room: {
-                day: [False] * self.hours_per_day
+                day: [bool(self.room_mask[rid][day] >> hour & 1)
+                      for hour in range(self.hours_per_day)]
                 for day in range(len(self.days))
             }
-            for room in (self.theory_rooms + self.lab_rooms)
+            for rid, room in enumerate(self.rooms)
         }
-        self._set_break_time()
 
-    def _set_break_time(self):
-        for section in self.sections:
-            for day in range(len(self.days)):
-                self.timetable[section][day][self.break_hour] = {
-                    'course': 'Break',
-                    'room': 'Break',
-                    'type': 'break'
-                }
+    def place(self, section_id: int, course_id: int, day: int, start_hour: int,
+              duration: int, room_id: int, slot_type: int):
+        window = self.window_masks[duration][start_hour]
+        self.section_mask[section_id][day] |= window
+        self.room_mask[room_id][day] |= window
+        self.update_room_windows(room_id, day, start_hour, duration)
+        iid = self.instructor_of(section_id, course_id)
+        if iid is not None:
+            self.instructor_mask[iid][day] |= window
+        hours = self.course_mask[section_id][day]
+        hours[course_id] = hours.get(course_id, 0) | window
+        base = self.cell(section_id, day, 0)
+        for hour in range(start_hour, start_hour + duration):
+            self.cell_course[base + hour] = course_id
+            self.cell_room[base + hour] = room_id
+            self.cell_type[base + hour] = slot_type
+        if slot_type in (THEORY, LAB):
+            self.set_class_mask(section_id, day, self.class_mask[section_id][day] | window)
+        # Undo log and assignment vector in one
+        self.placements.append((section_id, course_id, day, start_hour, duration, room_id, slot_type))
+
+    def clear_cells(self, placement: Tuple):
+        section_id, course_id, day, start_hour, duration, room_id, _ = placement
+        window = self.window_masks[duration][start_hour]
+        self.section_mask[section_id][day] &= ~window
+        self.room_mask[room_id][day] &= ~window
+        self.update_room_windows(room_id, day, start_hour, duration)
+        iid = self.instructor_of(section_id, course_id)
+        if iid is not None:
+            self.instructor_mask[iid][day] &= ~window
+        hours = self.course_mask[section_id][day]
+        remaining = hours[course_id] & ~window
+        if remaining:
+            hours[course_id] = remaining
+        else:
+            del hours[course_id]
+        base = self.cell(section_id, day, 0)
+        for hour in range(start_hour, start_hour + duration):
+            self.cell_course[base + hour] = -1
+            self.cell_room[base + hour] = -1
+            self.cell_type[base + hour] = FREE
+
+    def update_room_windows(self, room_id: int, day: int, start_hour: int, duration: int):
+        # Refresh the room's bit in every indexed window overlapping the changed hours
+        bit = 1 << room_id
+        busy = self.room_mask[room_id][day]
+        for length, windows in self.free_rooms.items():
+            row = windows[day]
+            masks = self.window_masks[length]
+            for start in range(max(0, start_hour - length + 1),
+                               min(start_hour + duration, self.hours_per_day - length + 1)):
+                if busy & masks[start]:
+                    row[start] &= ~bit
+                else:
+                    row[start] |= bit
+
+    def unplace(self, placement: Tuple):
+        section_id, _, day, start_hour, duration, _, slot_type = placement
+        if self.placements and self.placements[-1] == placement:
+            self.placements.pop()
+        else:
+            self.placements.remove(placement)
+        self.clear_cells(placement)
+        if slot_type in (THEORY, LAB):
+            window = self.window_masks[duration][start_hour]
+            self.set_class_mask(section_id, day, self.class_mask[section_id][day] & ~window)
+
+    def reset_timetable(self):
+        # Clear only the cells touched since the last reset, leaving breaks in place
+        for placement in self.placements:
+            self.clear_cells(placement)
+            self.class_mask[placement[0]][placement[2]] = 0
+        self.placements = []
+        self.score = 0
+
+    def set_class_mask(self, section_id: int, day: int, mask: int):
+        self.score += self.score_delta(section_id, day, mask)
+        self.class_mask[section_id][day] = mask
+
+    def score_delta(self, section_id: int, day: int, mask: int) -> float:
+        # Score change if the day's class hours became `mask`
+        return self.day_score_table[mask] - self.day_score_table[self.class_mask[section_id][day]]
+
+    def course_hours(self, section: str, day: int, course: str) -> int:
+        # Bitmask of the hours the course holds in the section's day
+        cid = self.course_ids.get(course)
+        if cid is None:
+            return 0
+        return self.course_mask[self.section_ids[section]][day].get(cid, 0)
+
     def count_daily_lectures(self, section: str, day: int, course: str) -> int:
-        return sum(
-            1 for slot in self.timetable[section][day]
-            if slot and slot['course'] == course
-        )
+        return bin(self.course_hours(section, day, course)).count('1')
 
     def count_consecutive_lectures(self, section: str, day: int, start_hour: int, course: str) -> int:
-        count = 0
-        hour = start_hour
-        while hour < self.hours_per_day and self.timetable[section][day][hour] and \
-              self.timetable[section][day][hour]['course'] == course:
-            count += 1
-            hour += 1
-        return count
+        return self.consecutive_run(self.course_hours(section, day, course), start_hour)
+
+    def consecutive_run(self, mask: int, start_hour: int) -> int:
+        # Length of the run of set bits from start_hour upwards
+        if start_hour < 0:
+            # A start of -1 wraps to the last hour, as list indexing did
+            if not mask >> (self.hours_per_day - 1) & 1:
+                return 0
+            return 1 + self.consecutive_run(mask, 0)
+        run = mask >> start_hour
+        return (run ^ (run + 1)).bit_length() - 1
 
     def is_consecutive_slots(self, section: str, day: int, hour: int, course: str) -> bool:
-        for start in range(hour - 2, hour + 1):
-            if 0 <= start <= self.hours_per_day - 3:
-                slots = [
-                    self.timetable[section][day][h]
-                    for h in range(start, start + 3)
-                    if h != self.break_hour
-                ]
-                if all(slot and slot['course'] == course for slot in slots):
-                    return False
+        mask = self.course_hours(section, day, course)
+        if not mask:
+            return True
+        # No three-hour window around `hour` may already be all this course (the break aside)
+        for start in range(max(hour - 2, 0), min(hour, self.hours_per_day - 3) + 1):
+            window = self.window_masks[3][start] & ~self.break_mask
+            if mask & window == window:
+                return False
         return True
 
     """
@@ -121,17 +504,13 @@ class TimeTable:
     """
 
     def check_gaps(self, section: str, day: int, hour: int, course: str) -> bool:
-        schedule = self.timetable[section][day]
-        course_slots = [
-            i for i, slot in enumerate(schedule)
-            if slot and slot['course'] == course and i != hour
-        ]
+        course_slots = self.course_hours(section, day, course) & ~(1 << hour)
         
         if not course_slots:
             return True
             
-        min_slot = min(course_slots)
-        max_slot = max(course_slots)
+        min_slot = (course_slots & -course_slots).bit_length() - 1
+        max_slot = course_slots.bit_length() - 1
         
         if hour < min_slot:
             return (min_slot - hour) <= 2
@@ -144,11 +523,8 @@ class TimeTable:
         if hour + duration > self.hours_per_day:
             return False
             
-        if any(h == self.break_hour for h in range(hour, hour + duration)):
-            return False
-        
-        if not all(self.timetable[section][day][h] is None 
-                  for h in range(hour, hour + duration)):
+        # Break hour is always set in the section mask
+        if self.section_mask[self.section_ids[section]][day] & self.window_masks[duration][hour]:
             return False
         
         if course and not self.is_consecutive_slots(section, day, hour, course):
@@ -159,57 +535,145 @@ class TimeTable:
             
         return True
 
+    def free_starts(self, section_id: int, day: int, duration: int, busy: int = 0) -> int:
+        # Bitmask of start hours where the section has `duration` free hours in a row
+        # (`busy` adds hours blocked for other reasons, e.g. the instructor's)
+        free = ~(self.section_mask[section_id][day] | busy) & ((1 << self.hours_per_day) - 1)
+        starts = free
+        for offset in range(1, duration):
+            starts &= free >> offset
+        return starts
+
+    def pick_room(self, room_bits: int) -> int:
+        room_ids = []
+        while room_bits:
+            lowest = room_bits & -room_bits
+            room_ids.append(lowest.bit_length() - 1)
+            room_bits ^= lowest
+        return self.random.choice(room_ids)
+
+    def makeup_session(self, course: str, is_lab: bool) -> int:
+        # Makeups take the rooms and instructor of the session they make up for
+        session = self.course_ids.get(f"{course}Lab" if is_lab else course)
+        if session is None:
+            session = self.course_id(f"{course} Makeup {'Lab' if is_lab else 'Class'}")
+        return session
+
     def find_free_slot_and_room(self, section: str, course: str, is_lab: bool = False) -> Optional[Tuple[int, int, str]]:
         duration = 3 if is_lab else 1
         days = list(range(len(self.days)))
         hours = list(range(self.hours_per_day - duration + 1))
-        rooms = self.lab_rooms if is_lab else self.theory_rooms
+        sid = self.section_ids[section]
+        session = self.makeup_session(course, is_lab)
+        room_bits = self.allowed_rooms(sid, session, is_lab)
         
-        random.shuffle(days)
-        random.shuffle(hours)
-        random.shuffle(rooms)
+        self.random.shuffle(days)
+        self.random.shuffle(hours)
         
         for day in days:
+            # Free section windows and free rooms per window come from the maintained indexes
+            starts = self.free_starts(sid, day, duration, self.instructor_busy(sid, session, day))
+            if not starts:
+                continue
+            room_windows = self.free_rooms[duration][day]
             for hour in hours:
+                if not starts >> hour & 1 or not room_windows[hour] & room_bits:
+                    continue
                 if self.is_slot_free(section, day, hour, course, duration):
-                    for room in rooms:
-                        if all(not self.room_schedule[room][day][h] 
-                              for h in range(hour, hour + duration)):
-                            return day, hour, room
+                    return day, hour, self.rooms[self.pick_room(room_windows[hour] & room_bits)]
         return None
 
+    def section_starts(self, section_id: int, course_id: int, day: int, duration: int) -> int:
+        # Bitmask of start hours where the section may take `duration` hours of the course
+        course_hours = self.course_mask[section_id][day].get(course_id, 0)
+
+        # Skip if already has maximum lectures for this course today
+        if bin(course_hours).count('1') >= self.max_daily_lectures:
+            return 0
+
+        # The section and its instructor for the course must both be free
+        # (the break hour is always busy)
+        starts = self.free_starts(section_id, day, duration,
+                                  self.instructor_busy(section_id, course_id, day))
+
+        # Check consecutive lectures constraint: no start right after a full run
+        runs = course_hours
+        for offset in range(1, self.max_consecutive_lectures):
+            runs &= course_hours >> offset
+        blocked = runs << 1
+        if self.consecutive_run(course_hours, -1) >= self.max_consecutive_lectures:
+            blocked |= 1
+        return starts & ~blocked
+
+    def room_starts(self, room_bits: int, day: int, duration: int) -> int:
+        # Bitmask of start hours where at least one of the rooms is free for `duration` hours
+        starts = 0
+        for hour, free in enumerate(self.free_rooms[duration][day]):
+            if free & room_bits:
+                starts |= 1 << hour
+        return starts
+
+    def free_room_bits(self, day: int, hour: int, duration: int = 1) -> int:
+        # Rooms free for the whole window, straight from the index for the lengths it keeps
+        if duration < 1 or not 0 <= hour <= self.hours_per_day - duration:
+            return 0
+        windows = self.free_rooms.get(duration)
+        if windows is not None:
+            return windows[day][hour]
+        window = self.window_masks[duration][hour]
+        return sum(1 << rid for rid, busy in enumerate(self.room_mask) if not busy[day] & window)
+
+    def query_free_rooms(self, day: int, hour: int, duration: int = 1, kind: Optional[str] = None,
+                         min_capacity: int = 0) -> List[str]:
+        # Rooms free from `hour` for `duration` hours, optionally only 'theory' or 'lab' rooms
+        # seating at least min_capacity
+        room_bits = self.free_room_bits(day, hour, duration)
+        if kind is not None:
+            room_bits &= self.rooms_with_capacity(kind == 'lab', min_capacity)
+        elif min_capacity:
+            room_bits &= self.rooms_with_capacity(False, min_capacity) | self.rooms_with_capacity(True, min_capacity)
+        rooms = []
+        while room_bits:
+            lowest = room_bits & -room_bits
+            rooms.append(self.rooms[lowest.bit_length() - 1])
+            room_bits ^= lowest
+        return rooms
+
+    def query_free_slots(self, sections: List[str], duration: int = 1) -> List[List[int]]:
+        # Start hours of each day where every one of the sections is free for `duration` hours
+        section_ids = [self.section_ids[section] for section in sections]
+        slots = []
+        for day in range(len(self.days)):
+            busy = 0
+            for sid in section_ids:
+                busy |= self.section_mask[sid][day]
+            starts = self.free_starts(section_ids[0], day, duration, busy) if section_ids else 0
+            slots.append(self.mask_hours(starts))
+        return slots
+
     def find_valid_slot(self, section: str, course: str, is_lab: bool) -> Optional[Tuple[int, int, str]]:
         duration = 3 if is_lab else 1
-        rooms = self.lab_rooms if is_lab else self.theory_rooms
-        random.shuffle(rooms)
         
         days = list(range(len(self.days)))
-        random.shuffle(days)
+        self.random.shuffle(days)
+
+        sid = self.section_ids[section]
+        cid = self.course_id(course)
+        room_bits = self.allowed_rooms(sid, self.course_id(f"{course}Lab") if is_lab else cid, is_lab)
         
         for day in days:
-            # Skip if already has maximum lectures for this course today
-            if self.count_daily_lectures(section, day, course) >= 2:
+            starts = self.section_starts(sid, cid, day, duration)
+            if not starts:
                 continue
-                
+            room_windows = self.free_rooms[duration][day]
             for hour in range(self.hours_per_day - duration + 1):
-                if hour == self.break_hour:
+                if not starts >> hour & 1:
                     continue
                     
-                # Check if slot is free
-                if not all(self.timetable[section][day][h] is None 
-                          for h in range(hour, hour + duration)):
-                    continue
-                    
-                # Check consecutive lectures constraint
-                prev_consecutive = self.count_consecutive_lectures(section, day, hour - 1, course)
-                if prev_consecutive >= self.max_consecutive_lectures:
-                    continue
-                    
-                # Find available room
-                for room in rooms:
-                    if all(not self.room_schedule[room][day][h] 
-                          for h in range(hour, hour + duration)):
-                        return day, hour, room
+                # Free rooms for the whole window come straight from the index
+                rooms = room_windows[hour] & room_bits
+                if rooms:
+                    return day, hour, self.rooms[self.pick_room(rooms)]
         
         return None
 
@@ -222,16 +686,22 @@ class TimeTable:
         duration = 3 if is_lab else 1
         course_name = f"{course}{'Lab' if is_lab else ''}"
         
-        for hour in range(start_hour, start_hour + duration):
-            self.timetable[section][day][hour] = {
-                'course': course_name,
-                'room': room,
-                'type': 'lab' if is_lab else 'theory'
-            }
-            self.room_schedule[room][day][hour] = True
+        self.place(self.section_ids[section], self.course_id(course_name), day,
+                   start_hour, duration, self.room_ids[room],
+                   LAB if is_lab else THEORY)
         return True
 
-    def generate_timetable(self) -> bool:
+    def generate_timetable(self, mode: str = 'greedy', max_nodes: int = 100000,
+                           time_limit: Optional[float] = None, max_steps: int = 2000) -> bool:
+        if mode == 'search':
+            return self.search_timetable(max_nodes, time_limit)['status'] == 'solved'
+        if mode == 'repair':
+            # Keep the partial timetable and repair it with min-conflicts
+            from repair import MinConflictsRepair
+            return MinConflictsRepair(self, max_steps).solve()
+        if mode != 'greedy':
+            raise ValueError(f"Unknown generation mode: {mode}")
+
         # Schedule labs first
         for course, hours in self.courses.items():
             if hours['lab'] > 0:
@@ -251,46 +721,391 @@ class TimeTable:
 
         return True
 
-    def add_makeup_class(self, section: str, course: str, is_lab: bool = False) -> bool:
+    def place_makeup(self, section: str, course: str, is_lab: bool = False) -> Optional[Tuple[int, int, str]]:
         slot = self.find_free_slot_and_room(section, course, is_lab)
         if not slot:
-            return False
+            return None
             
         day, hour, room = slot
         duration = 3 if is_lab else 1
         course_name = f"{course} Makeup {'Lab' if is_lab else 'Class'}"
         
-        for h in range(hour, hour + duration):
-            self.timetable[section][day][h] = {
-                'course': course_name,
-                'room': room,
-                'type': 'makeup'
-            }
-            self.room_schedule[room][day][h] = True
-        return True
+        self.place(self.section_ids[section], self.course_id(course_name), day,
+                   hour, duration, self.room_ids[room], MAKEUP)
+        return slot
+
+    def add_makeup_class(self, section: str, course: str, is_lab: bool = False) -> bool:
+        return self.place_makeup(section, course, is_lab) is not None
+
+    def add_makeup_classes(self, makeups: List[Dict]) -> List[Optional[Tuple[int, int, str]]]:
+        # Places the makeups in order against the live indexes; None where no slot was found
+        return [
+            self.place_makeup(makeup['section'], makeup['course'], makeup.get('is_lab', False))
+            for makeup in makeups
+        ]
+
+    def session_at(self, section_id: int, day: int, hour: int) -> Optional[Tuple]:
+        # The theory or lab placement holding the section's hour, read off the cell arrays
+        i = self.cell(section_id, day, hour)
+        slot_type = self.cell_type[i]
+        if slot_type not in (THEORY, LAB):
+            return None
+        cid, rid = self.cell_course[i], self.cell_room[i]
+        duration = 3 if slot_type == LAB else 1
+        base = self.cell(section_id, day, 0)
+        for start in range(max(0, hour - duration + 1), hour + 1):
+            if start + duration <= self.hours_per_day and all(
+                    self.cell_course[base + h] == cid and self.cell_room[base + h] == rid
+                    for h in range(start, start + duration)):
+                return section_id, cid, day, start, duration, rid, slot_type
+        return None
+
+    def edit_room(self, placement: Tuple, day: int, hour: int, rooms: List[int]) -> Tuple[Optional[int], str]:
+        # Room for the (unplaced) session at the new window: the first of `rooms` that
+        # is allowed and free, else the lowest such room; or None and the rule broken
+        sid, cid, _, _, duration, _, slot_type = placement
+        if not 0 <= hour <= self.hours_per_day - duration:
+            return None, 'The session does not fit in the day at that hour'
+        if not self.free_starts(sid, day, duration) >> hour & 1:
+            return None, 'The section is busy at that time'
+        if not self.free_starts(sid, day, duration, self.instructor_busy(sid, cid, day)) >> hour & 1:
+            return None, 'The instructor is busy or unavailable at that time'
+        if not self.section_starts(sid, self.course_rule[cid], day, duration) >> hour & 1:
+            return None, 'The course would break its daily or consecutive lecture limit'
+        free = self.free_rooms[duration][day][hour] & self.allowed_rooms(sid, cid, slot_type == LAB)
+        for rid in rooms:
+            if free >> rid & 1:
+                return rid, ''
+        if not free:
+            return None, 'No allowed room is free at that time'
+        return (free & -free).bit_length() - 1, ''
+
+    def edit_result(self, before: float, moves: List[Tuple], apply: bool) -> Dict:
+        result = {
+            'valid': True,
+            'score_delta': self.score - before,
+            'score': self.score,
+            'moves': [
+                {'section': self.sections[sid], 'course': self.course_names[cid], 'day': day,
+                 'hour': hour, 'room': self.rooms[rid]}
+                for sid, cid, day, hour, _, rid, _ in moves
+            ]
+        }
+        if not apply:
+            for placement in reversed(moves):
+                self.unplace(placement)
+        return result
+
+    def move_session(self, section: str, day: int, hour: int, new_day: int, new_hour: int,
+                     room: Optional[str] = None, apply: bool = True) -> Dict:
+        """
+        Moves the theory or lab session holding (day, hour) of the section to
+        start at (new_day, new_hour), in `room` when given, otherwise in its
+        current room if free. Validated against the section, instructor, room
+        and course-pattern rules from the maintained masks. With apply=False
+        the move is only checked and scored.
+        """
+        sid = self.section_ids[section]
+        placement = self.session_at(sid, day, hour)
+        if placement is None:
+            return {'valid': False, 'message': 'No theory or lab session at that time'}
+        if room is not None and room not in self.room_ids:
+            return {'valid': False, 'message': f"Unknown room: {room}"}
+
+        before = self.score
+        self.unplace(placement)
+        rid, message = self.edit_room(placement, new_day, new_hour,
+                                      [self.room_ids[room]] if room is not None else [placement[5]])
+        if rid is None or (room is not None and rid != self.room_ids[room]):
+            self.place(*placement)
+            return {'valid': False, 'message': message or f"Room {room} is not allowed or not free"}
+
+        moved = placement[:2] + (new_day, new_hour) + placement[4:5] + (rid, placement[6])
+        self.place(*moved)
+        result = self.edit_result(before, [moved], apply)
+        if not apply:
+            self.place(*placement)
+        return result
+
+    def swap_sessions(self, section: str, day: int, hour: int, other_section: str,
+                      other_day: int, other_hour: int, apply: bool = True) -> Dict:
+        """
+        Two sessions of the same length trade their windows, each taking the
+        other's room when allowed (else keeping its own, else any free one).
+        """
+        first = self.session_at(self.section_ids[section], day, hour)
+        second = self.session_at(self.section_ids[other_section], other_day, other_hour)
+        if first is None or second is None:
+            return {'valid': False, 'message': 'No theory or lab session at that time'}
+        if first == second:
+            return {'valid': False, 'message': 'Cannot swap a session with itself'}
+        if first[4] != second[4]:
+            return {'valid': False, 'message': 'Only sessions of the same length can be swapped'}
 
-    def monte_carlo_simulation(self, num_iterations: int = 1000) -> Dict:
+        before = self.score
+        self.unplace(first)
+        self.unplace(second)
+        moves = []
+        for placement, target in ((first, second), (second, first)):
+            rid, message = self.edit_room(placement, target[2], target[3], [target[5], placement[5]])
+            if rid is None:
+                for done in reversed(moves):
+                    self.unplace(done)
+                self.place(*first)
+                self.place(*second)
+                return {'valid': False, 'message': message}
+            moved = placement[:2] + target[2:4] + placement[4:5] + (rid, placement[6])
+            self.place(*moved)
+            moves.append(moved)
+
+        result = self.edit_result(before, moves, apply)
+        if not apply:
+            self.place(*first)
+            self.place(*second)
+        return result
+
+    def snapshot(self) -> List[Tuple]:
+        # Compact assignment vector of (section, course, day, hour, duration, room, type)
+        return list(self.placements)
+
+    def restore(self, snapshot: List[Tuple]):
+        self.reset_timetable()
+        for placement in snapshot:
+            self.place(*placement)
+
+    def to_state(self) -> Dict:
+        # JSON-friendly form: the input plus the assignment vector
+        return {
+            'config': self.input_config(),
+            'course_names': list(self.course_names),
+            'placements': [list(placement) for placement in self.placements],
+            'monte_carlo_stats': dict(self.monte_carlo_stats)
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'TimeTable':
+        timetable = cls(**state['config'])
+        for cid, name in enumerate(state['course_names']):
+            if timetable.course_id(name) != cid:
+                raise ValueError(f"Course id mismatch while loading '{name}'")
+        timetable.restore([tuple(placement) for placement in state['placements']])
+        timetable.monte_carlo_stats.update(state['monte_carlo_stats'])
+        return timetable
+
+    def assignments(self) -> List[List]:
+        # Name-based assignment vector, independent of the order of the input lists
+        return [
+            [self.sections[sid], self.course_names[cid], day, hour, duration, self.rooms[rid], slot_type]
+            for sid, cid, day, hour, duration, rid, slot_type in self.placements
+        ]
+
+    def load_assignments(self, assignments: List[List]):
+        self.restore([
+            (self.section_ids[section], self.course_id(course), day, hour, duration,
+             self.room_ids[room], slot_type)
+            for section, course, day, hour, duration, room, slot_type in assignments
+        ])
+
+    def memory_footprint(self) -> int:
+        # Approximate bytes held by the grid, masks and assignment vector
+        cells = (self.cell_course.itemsize + self.cell_room.itemsize +
+                 self.cell_type.itemsize) * len(self.cell_type)
+        masks = 3 * 28 * len(self.days) * (len(self.sections) + len(self.rooms) + len(self.instructors))
+        course_masks = 100 * sum(len(hours) for days in self.course_mask for hours in days)
+        export = sum(map(len, self.export_cache['parts'].values())) if self.export_cache else 0
+        saved = 60 * len(self.saved_rows[1]) if self.saved_rows else 0
+        return cells + masks + course_masks + 120 * len(self.placements) + export + saved
+
+    @staticmethod
+    def pack(free: int, duration: int) -> int:
+        # Most disjoint runs of `duration` free hours, packed left to right
+        count = 0
+        run = 0
+        while free:
+            if free & 1:
+                run += 1
+                if run == duration:
+                    count += 1
+                    run = 0
+            else:
+                run = 0
+            free >>= 1
+        return count
+
+    def describe_rooms(self, room_bits: int) -> str:
+        if room_bits == self.theory_room_bits:
+            return 'the theory rooms'
+        if room_bits == self.lab_room_bits:
+            return 'the lab rooms'
+        names = [room for rid, room in enumerate(self.rooms) if room_bits >> rid & 1]
+        if not names:
+            return 'no room'
+        if len(names) > 5:
+            names = names[:5] + [f"{len(names) - 5} more"]
+        return ', '.join(names)
+
+    def check_feasibility(self) -> List[Dict]:
+        """
+        Counting and matching bounds that prove the input has no timetable,
+        checked before any attempt is made. Returns the violated bounds, most
+        violated first, each naming its binding resource. An empty list only
+        means no bound is violated, not that a timetable exists.
+        """
+        problems = []
+
+        def violated(resource: str, name: str, demand: int, capacity: int, message: str):
+            problems.append({'resource': resource, 'name': name, 'demand': demand,
+                             'capacity': capacity, 'message': message})
+
+        num_days = len(self.days)
+        usable = ((1 << self.hours_per_day) - 1) & ~self.break_mask
+        # Every course with lab hours gets one 3-hour lab block a week
+        theory_hours = sum(hours['theory'] for hours in self.courses.values())
+        lab_blocks = sum(1 for hours in self.courses.values() if hours['lab'] > 0)
+
+        # Every section takes every course: weekly hours and lab windows per section
+        week_hours = num_days * len(self.teaching_hours)
+        if theory_hours + 3 * lab_blocks > week_hours:
+            violated('section', 'each section', theory_hours + 3 * lab_blocks, week_hours,
+                     f"Each section needs {theory_hours + 3 * lab_blocks} hours a week "
+                     f"but only {week_hours} teaching hours exist")
+        lab_windows = num_days * self.pack(usable, 3)
+        if lab_blocks > lab_windows:
+            violated('section', 'each section', lab_blocks, lab_windows,
+                     f"Each section needs {lab_blocks} lab blocks a week "
+                     f"but only {lab_windows} 3-hour windows fit around the break")
+
+        # Max lectures per course per day
+        for course, hours in self.courses.items():
+            most = self.max_daily_lectures * num_days
+            if hours['theory'] > most:
+                violated('course', course, hours['theory'], most,
+                         f"{course} needs {hours['theory']} theory hours a week "
+                         f"but at most {self.max_daily_lectures} a day fit in {num_days} days")
+
+        # Rooms: sessions that can only use a set of rooms must fit its windows (Hall's condition
+        # over every allowed-room set that occurs, plus each room kind as a whole)
+        demand: Dict[Tuple[int, int], int] = {}
+        for sid in range(len(self.sections)):
+            for course, hours in self.courses.items():
+                if hours['theory'] > 0:
+                    key = (self.allowed_rooms(sid, self.course_ids[course], False), 1)
+                    demand[key] = demand.get(key, 0) + hours['theory']
+                if hours['lab'] > 0:
+                    key = (self.allowed_rooms(sid, self.course_ids[f"{course}Lab"], True), 3)
+                    demand[key] = demand.get(key, 0) + 1
+        supply = {
+            duration: [num_days * self.pack(~busy & usable, duration) for busy in self.room_unavailable]
+            for duration in (1, 3)
+        }
+        room_sets = set(demand) | {(self.theory_room_bits, 1), (self.lab_room_bits, 3)}
+        for room_bits, duration in sorted(room_sets):
+            needed = sum(count for (bits, length), count in demand.items()
+                         if length == duration and not bits & ~room_bits)
+            available = sum(windows for rid, windows in enumerate(supply[duration]) if room_bits >> rid & 1)
+            if needed > available:
+                kind = 'lab blocks' if duration == 3 else 'theory hours'
+                rooms = self.describe_rooms(room_bits)
+                if not room_bits:
+                    message = f"{needed} {kind} have no room of the right kind and size"
+                else:
+                    message = f"{needed} {kind} can only use {rooms}, which fit {available} a week"
+                violated('rooms', rooms, needed, available, message)
+
+        # Instructors: assigned teaching hours against available hours
+        load = [0] * len(self.instructors)
+        for (sid, cid), iid in self.session_instructor.items():
+            load[iid] += self.weekly_hours(self.course_names[cid])
+        for iid, hours in enumerate(load):
+            available = num_days * bin(~self.instructor_unavailable[iid] & usable).count('1')
+            if hours > available:
+                name = str(self.instructors[iid]['id'])
+                violated('instructor', name, hours, available,
+                         f"Instructor {name} is assigned {hours} hours a week "
+                         f"but is available for {available}")
+
+        problems.sort(key=lambda problem: -problem['demand'] / max(problem['capacity'], 0.5))
+        return problems
+
+    def run_restarts(self, num_iterations: int,
+                     progress: Optional[Callable[[int, int], Optional[bool]]] = None,
+                     mode: str = 'greedy', until_success: bool = False) -> Tuple[Dict, float, Optional[List[Tuple]]]:
+        stats = {
+            'total_attempts': 0,
+            'successful_attempts': 0,
+            'failed_attempts': 0
+        }
         best_score = float('-inf')
-        best_timetable = None
-        best_room_schedule = None
+        best_snapshot = None
         
-        for _ in range(num_iterations):
-            self.monte_carlo_stats['total_attempts'] += 1
-            self.initialize_timetable()
+        for iteration in range(num_iterations):
+            stats['total_attempts'] += 1
+            self.reset_timetable()
             
-            if self.generate_timetable():
-                self.monte_carlo_stats['successful_attempts'] += 1
+            if self.generate_timetable(mode):
+                stats['successful_attempts'] += 1
                 current_score = self.evaluate_timetable()
                 if current_score > best_score:
                     best_score = current_score
-                    best_timetable = self.copy_timetable()
-                    best_room_schedule = self.copy_room_schedule()
+                    best_snapshot = self.snapshot()
+                if until_success:
+                    break
             else:
-                self.monte_carlo_stats['failed_attempts'] += 1
+                stats['failed_attempts'] += 1
+
+            # A progress callback returning False cancels the remaining restarts
+            if progress and progress(iteration + 1, num_iterations) is False:
+                break
 
-        if best_timetable:
-            self.timetable = best_timetable
-            self.room_schedule = best_room_schedule
+        return stats, best_score, best_snapshot
+
+    def parallel_restarts(self, num_iterations: int, workers: int, seed: Optional[int] = None,
+                          progress: Optional[Callable[[int, int], Optional[bool]]] = None,
+                          mode: str = 'greedy') -> List[Tuple]:
+        # Split the restarts into fixed chunks, several per worker so progress
+        # moves steadily, with one derived seed per chunk: the same seed always
+        # replays the same attempts
+        count = min(num_iterations, workers * RESTART_CHUNKS_PER_WORKER)
+        seeder = random.Random(seed) if seed is not None else self.random
+        seeds = [seeder.randrange(2 ** 32) for _ in range(count)]
+        chunks = [num_iterations // count + (1 if i < num_iterations % count else 0)
+                  for i in range(count)]
+        config = self.input_config()
+
+        # Running chunks poll the event between attempts, so setting it cancels them
+        stop = multiprocessing.Event()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init,
+                                 initargs=(stop,)) as executor:
+            futures = [executor.submit(_monte_carlo_worker, config, chunk, chunk_seed, mode)
+                       for chunk, chunk_seed in zip(chunks, seeds)]
+            if progress:
+                _poll_workers(futures, chunks, stop, progress)
+            return [future.result() for future in futures if not future.cancelled()]
+
+    def monte_carlo_simulation(self, num_iterations: int = 1000, workers: int = 1,
+                               seed: Optional[int] = None,
+                               progress: Optional[Callable[[int, int], Optional[bool]]] = None,
+                               mode: str = 'greedy') -> Dict:
+        # mode 'repair' repairs failed attempts instead of discarding them
+        if workers > 1:
+            results = self.parallel_restarts(num_iterations, workers, seed, progress, mode)
+        else:
+            if seed is not None:
+                self.random.seed(seed)
+            results = [self.run_restarts(num_iterations, progress, mode)]
+
+        # Merge in worker order; ties keep the earliest worker's timetable
+        best_score = float('-inf')
+        best_snapshot = None
+        for stats, score, snapshot in results:
+            for key, value in stats.items():
+                self.monte_carlo_stats[key] += value
+            if snapshot is not None and score > best_score:
+                best_score = score
+                best_snapshot = snapshot
+
+        if best_snapshot is not None:
+            self.restore(best_snapshot)
             return {
                 'success_rate': (self.monte_carlo_stats['successful_attempts'] / 
                                self.monte_carlo_stats['total_attempts']) * 100,
@@ -298,23 +1113,344 @@ class TimeTable:
             }
         return {'success_rate': 0, 'best_score': 0}
 
+    def run_portfolio(self, strategies: Optional[List[Dict]] = None, deadline: float = 30.0,
+                      seed: Optional[int] = None, first_feasible: bool = True,
+                      progress: Optional[Callable[[float, float], Optional[bool]]] = None) -> Dict:
+        """
+        Races the strategies (see PORTFOLIO_STRATEGIES) in parallel processes
+        under one shared deadline. With first_feasible the first strategy to
+        produce a valid timetable wins and the others are stopped; otherwise,
+        or when none is done by then, the best timetable at the deadline wins.
+        The winner is recorded in portfolio_stats.
+        """
+        strategies = strategies or PORTFOLIO_STRATEGIES
+        seeder = random.Random(seed) if seed is not None else self.random
+        seeds = [seeder.randrange(2 ** 32) for _ in strategies]
+        config = self.input_config()
+        start = time.time()
+        end = start + deadline
+
+        # Workers poll the event between attempts, so setting it stops them all
+        stop = multiprocessing.Event()
+        with ProcessPoolExecutor(max_workers=len(strategies), initializer=_worker_init,
+                                 initargs=(stop,)) as executor:
+            futures = [executor.submit(_portfolio_worker, config, strategy, worker_seed, end, first_feasible)
+                       for strategy, worker_seed in zip(strategies, seeds)]
+            first = None
+            pending = set(futures)
+            while pending and not stop.is_set():
+                done, pending = wait(pending, timeout=max(0.0, min(1.0, end - time.time())),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    if first_feasible and first is None and future.exception() is None \
+                            and future.result()[2] is not None:
+                        first = futures.index(future)
+                        stop.set()
+                if time.time() >= end or (progress and progress(min(time.time() - start, deadline),
+                                                                 deadline) is False):
+                    stop.set()
+
+        # Stopped strategies still hand back their best timetable so far
+        best_score = float('-inf')
+        best_snapshot = None
+        winner = first
+        report = {}
+        for i, (strategy, future) in enumerate(zip(strategies, futures)):
+            if future.exception() is not None:
+                report[strategy['name']] = {'status': 'error', 'error': str(future.exception())}
+                continue
+            stats, score, snapshot, elapsed = future.result()
+            report[strategy['name']] = dict(stats, status='feasible' if snapshot is not None else 'infeasible',
+                                            score=score if snapshot is not None else None,
+                                            elapsed=round(elapsed, 3))
+            if first is None and snapshot is not None and score > best_score:
+                winner = i
+            if i == winner:
+                best_score, best_snapshot = score, snapshot
+
+        self.portfolio_stats = {
+            'winner': strategies[winner]['name'] if winner is not None else None,
+            'strategies': report
+        }
+        if best_snapshot is None:
+            return {'success_rate': 0, 'best_score': 0, 'winner': None}
+
+        self.restore(best_snapshot)
+        stats = report[strategies[winner]['name']]
+        return {
+            'success_rate': stats['successful_attempts'] / stats['total_attempts'] * 100,
+            'best_score': best_score,
+            'winner': strategies[winner]['name']
+        }
+
+    def required_sessions(self) -> List[Tuple[int, int, int, int]]:
+        # Every session to schedule, as (section, course, duration, slot type)
+        sessions = []
+        for course, hours in self.courses.items():
+            cid = self.course_ids[course]
+            for sid in range(len(self.sections)):
+                if hours['lab'] > 0:
+                    sessions.append((sid, self.course_ids[f"{course}Lab"], 3, LAB))
+                sessions.extend([(sid, cid, 1, THEORY)] * hours['theory'])
+        return sessions
+
+    def partition_sections(self, clusters: int) -> List[List[int]]:
+        # Even runs of sections ordered by their instructors, so sections that
+        # share instructors tend to fall in the same cluster
+        teachers = [set() for _ in self.sections]
+        for (sid, _), iid in self.session_instructor.items():
+            teachers[sid].add(iid)
+        order = sorted(range(len(self.sections)), key=lambda sid: sorted(teachers[sid]))
+        clusters = max(1, min(clusters, len(order)))
+        size, extra = divmod(len(order), clusters)
+        parts, start = [], 0
+        for i in range(clusters):
+            end = start + size + (1 if i < extra else 0)
+            parts.append(order[start:end])
+            start = end
+        return parts
+
+    def room_pools(self, parts: List[List[int]]) -> List[int]:
+        # Each kind of room is dealt out, largest first, to the cluster furthest
+        # below its share of that kind's teaching hours
+        pools = [0] * len(parts)
+        for is_lab, room_ids in ((False, self.theory_room_ids), (True, self.lab_room_ids)):
+            hours = sum(course['lab' if is_lab else 'theory'] for course in self.courses.values())
+            demand = [hours * len(part) for part in parts]
+            total = sum(demand)
+            if not total:
+                continue
+            given = [0] * len(parts)
+            for rid in sorted(room_ids, key=self.seats, reverse=True):
+                i = max(range(len(parts)), key=lambda i: demand[i] * len(room_ids) / total - given[i])
+                given[i] += 1
+                pools[i] |= 1 << rid
+        return pools
+
+    def place_if_valid(self, placement: Tuple) -> bool:
+        # Places the session if its section, instructor, course rules and room all allow it
+        sid, cid, day, hour, duration, rid, slot_type = placement
+        if slot_type == MAKEUP:
+            # Makeups are held to the rules of find_free_slot_and_room, not the daily limit
+            course, kind = self.course_names[cid].rsplit(' Makeup ', 1)
+            is_lab = kind == 'Lab'
+            session = self.makeup_session(course, is_lab)
+            valid = (self.free_starts(sid, day, duration, self.instructor_busy(sid, session, day)) >> hour & 1
+                     and self.is_slot_free(self.sections[sid], day, hour, course, duration))
+            room_bits = self.allowed_rooms(sid, session, is_lab)
+        else:
+            valid = self.section_starts(sid, self.course_rule[cid], day, duration) >> hour & 1
+            room_bits = self.allowed_rooms(sid, cid, slot_type == LAB)
+        if not (valid and self.free_room_bits(day, hour, duration) >> rid & 1 and room_bits >> rid & 1):
+            return False
+        self.place(*placement)
+        return True
+
+    def resolve_timetable(self, previous: List[List], max_steps: int = 2000,
+                          seed: Optional[int] = None) -> Dict:
+        """
+        Warm start from an earlier assignment (as from assignments()) after the
+        input changed, e.g. a section, room or course hours added or removed.
+
+        Every earlier placement still valid here is pinned, and only the
+        sessions left over are placed, by min-conflicts repair that may not
+        move pinned sessions. If that gets stuck the repair widens to all
+        required sessions; kept makeups stay pinned. Instructors carry over
+        through assigned_instructors, so only new (section, course) pairs, or
+        pairs whose instructor is no longer a candidate, get one assigned.
+        Churn, including reassigned instructors, is reported in resolve_stats.
+        """
+        from repair import MinConflictsRepair
+
+        if seed is not None:
+            self.random.seed(seed)
+        self.reset_timetable()
+        remaining = Counter(self.required_sessions())
+        kept = set()
+        dropped = 0
+        for section, course, day, hour, duration, room, slot_type in previous:
+            if section not in self.section_ids or room not in self.room_ids or course not in self.course_ids:
+                dropped += 1
+                continue
+            placement = (self.section_ids[section], self.course_ids[course], day, hour, duration,
+                         self.room_ids[room], slot_type)
+            session = MinConflictsRepair.session(placement)
+            # Makeups are kept when they still fit; required sessions only up to their hours
+            if (slot_type == MAKEUP or remaining[session] > 0) and self.place_if_valid(placement):
+                if slot_type != MAKEUP:
+                    remaining[session] -= 1
+                kept.add(placement)
+            else:
+                dropped += 1
+
+        # A few tries per affected session around the pinned ones, then widen
+        affected = sum(remaining.values())
+        repair = MinConflictsRepair(self, min(max_steps, 10 * affected), pinned=set(kept))
+        repair.unplaced = list(remaining.elements())
+        solved = repair.repair()
+        widened = not solved
+        if widened:
+            # Only required sessions are repaired, so makeups stay where they are
+            repair.pinned = {placement for placement in kept if placement[6] == MAKEUP}
+            repair.max_steps += max(max_steps, 2 * len(repair.unplaced))
+            solved = repair.repair()
+
+        current = {(section, course): instructor for section, course, instructor in self.instructor_assignments()}
+        self.resolve_stats = {
+            'kept': len(kept & set(self.placements)),
+            'dropped': dropped,
+            'reassigned_instructors': sum(
+                1 for section, course, instructor in self.assigned_instructors
+                if section in self.section_ids and course in self.course_ids
+                and current.get((section, course)) != instructor
+            ),
+            'affected_sessions': affected,
+            'repair_steps': repair.steps,
+            'widened': widened,
+            'status': 'solved' if solved else 'unsolved'
+        }
+        if not solved:
+            self.reset_timetable()
+            return {'success_rate': 0, 'best_score': 0}
+        return {'success_rate': 100, 'best_score': self.evaluate_timetable()}
+
+    def decompose_timetable(self, clusters: Optional[int] = None, workers: int = 1,
+                            seed: Optional[int] = None, mode: str = 'repair', num_iterations: int = 20,
+                            max_steps: int = 2000,
+                            progress: Optional[Callable[[int, int], Optional[bool]]] = None) -> Dict:
+        """
+        Splits the sections into clusters (one per worker by default), each with
+        a pool of rooms sized to its demand, and solves the clusters in parallel
+        with `num_iterations` restarts each. The cluster timetables are then
+        merged; sessions that clash across clusters on instructors or shared
+        rooms, or that a cluster failed to place, are repaired with
+        min-conflicts over the whole instance.
+        """
+        from repair import MinConflictsRepair
+
+        parts = self.partition_sections(clusters or workers)
+        pools = self.room_pools(parts)
+        seeder = random.Random(seed) if seed is not None else self.random
+        seeds = [seeder.randrange(2 ** 32) for _ in parts]
+        config = self.input_config()
+
+        # Clusters keep the rooms and instructors assigned by the whole instance;
+        # a session with no allowed room in its pool falls back to the shared rooms
+        jobs = []
+        for part, pool in zip(parts, pools):
+            local = {sid: i for i, sid in enumerate(part)}
+            session_rooms = {(local[sid], cid): bits & pool or bits
+                             for (sid, cid), bits in self.session_rooms.items() if sid in local}
+            session_instructor = {(local[sid], cid): iid
+                                  for (sid, cid), iid in self.session_instructor.items() if sid in local}
+            jobs.append((dict(config, sections=[self.sections[sid] for sid in part]),
+                         session_rooms, session_instructor))
+
+        if workers > 1:
+            stop = multiprocessing.Event()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init,
+                                     initargs=(stop,)) as executor:
+                futures = [executor.submit(_cluster_worker, *job, num_iterations, cluster_seed, mode)
+                           for job, cluster_seed in zip(jobs, seeds)]
+                if progress:
+                    _poll_workers(futures, [1] * len(futures), stop, progress)
+                results = [future.result() if not future.cancelled() else None for future in futures]
+        else:
+            results = []
+            for done, (job, cluster_seed) in enumerate(zip(jobs, seeds), 1):
+                results.append(_cluster_worker(*job, num_iterations, cluster_seed, mode))
+                if progress and progress(done, len(jobs)) is False:
+                    break
+            results += [None] * (len(jobs) - len(results))
+
+        # Merge: keep every cluster placement that is still valid in the whole instance
+        if seed is not None:
+            self.random.seed(seed)
+        self.reset_timetable()
+        remaining = Counter(self.required_sessions())
+        clashes = 0
+        for part, result in zip(parts, results):
+            snapshot = result[2] if result is not None else None
+            for sid, cid, day, hour, duration, rid, slot_type in snapshot or []:
+                sid = part[sid]
+                session = (sid, cid, duration, slot_type)
+                if remaining[session] > 0 and self.place_if_valid((sid, cid, day, hour, duration, rid, slot_type)):
+                    remaining[session] -= 1
+                else:
+                    clashes += 1
+
+        repair = MinConflictsRepair(self, max(max_steps, 2 * sum(remaining.values())))
+        repair.unplaced = list(remaining.elements())
+        unplaced = len(repair.unplaced)
+        solved = repair.repair()
+        self.decompose_stats = {
+            'clusters': len(parts),
+            'solved_clusters': sum(1 for result in results if result is not None and result[2] is not None),
+            'merge_clashes': clashes,
+            'repaired_sessions': unplaced,
+            'repair_steps': repair.steps,
+            'status': 'solved' if solved else 'unsolved'
+        }
+        if not solved:
+            self.reset_timetable()
+            return {'success_rate': 0, 'best_score': 0}
+        return {'success_rate': 100, 'best_score': self.evaluate_timetable()}
+
+    def search_timetable(self, max_nodes: int = 100000, time_limit: Optional[float] = None,
+                         progress: Optional[Callable[[int, int], Optional[bool]]] = None) -> Dict:
+        from search import BacktrackingSearch
+
+        self.reset_timetable()
+        search = BacktrackingSearch(self, max_nodes, time_limit, progress)
+        solved = search.solve()
+        if solved is None:
+            self.reset_timetable()
+            status = 'budget_exhausted'
+        else:
+            status = 'solved' if solved else 'infeasible'
+        self.search_stats = dict(search.stats(), status=status)
+
+        return {
+            'success_rate': 100 if solved else 0,
+            'best_score': self.evaluate_timetable() if solved else 0,
+            'status': status
+        }
+
+    def improve_timetable(self, max_iterations: int = 20000, time_limit: Optional[float] = None,
+                          seed: Optional[int] = None,
+                          progress: Optional[Callable[[int, int], Optional[bool]]] = None) -> Dict:
+        # Simulated annealing with tabu memory over the current, complete timetable
+        from local_search import LocalSearch
+
+        if seed is not None:
+            self.random.seed(seed)
+        search = LocalSearch(self, max_iterations, time_limit, progress=progress)
+        best_score = search.run()
+        self.improve_stats = search.stats()
+        return {
+            'initial_score': self.improve_stats['initial_score'],
+            'best_score': best_score
+        }
+
     def evaluate_timetable(self) -> float:
-        score = 0
-        for section in self.sections:
-            for day in range(len(self.days)):
-                gaps = self.count_gaps(section, day)
-                score -= gaps * 10
-                distribution = self.evaluate_distribution(section, day)
-                score += distribution
-        return score
+        # Maintained incrementally by place()
+        return self.score
+
+    def mask_hours(self, mask: int) -> List[int]:
+        return [hour for hour in range(self.hours_per_day) if mask >> hour & 1]
+
+    def class_slots(self, section: str, day: int) -> List[int]:
+        # Hours holding a theory or lab session (breaks and makeups excluded)
+        return self.mask_hours(self.class_mask[self.section_ids[section]][day])
 
     def count_gaps(self, section: str, day: int) -> int:
-        schedule = self.timetable[section][day]
-        class_slots = [
-            i for i, slot in enumerate(schedule)
-            if slot and slot['type'] not in ['break', 'makeup']
-        ]
+        return self.gap_table[self.class_mask[self.section_ids[section]][day]]
         
+    def evaluate_distribution(self, section: str, day: int) -> float:
+        return self.distribution_table[self.class_mask[self.section_ids[section]][day]]
+
+    @staticmethod
+    def slot_gaps(class_slots: List[int]) -> int:
         if len(class_slots) <= 1:
             return 0
             
@@ -325,13 +1461,8 @@ class TimeTable:
                 gaps += gap - 1
         return gaps
 
-    def evaluate_distribution(self, section: str, day: int) -> float:
-        schedule = self.timetable[section][day]
-        class_slots = [
-            i for i, slot in enumerate(schedule)
-            if slot and slot['type'] not in ['break', 'makeup']
-        ]
-        
+    @staticmethod
+    def slot_distribution(class_slots: List[int]) -> float:
         if len(class_slots) <= 1:
             return 0
             
@@ -343,104 +1474,193 @@ class TimeTable:
         return 10 / (1 + variance)
 
     def copy_timetable(self):
-        return {
-            section: {
-                day: [slot.copy() if slot else None 
-                      for slot in day_schedule]
-                for day, day_schedule in section_schedule.items()
-            }
-            for section, section_schedule in self.timetable.items()
-        }
+        return self.timetable
 
     def copy_room_schedule(self):
-        return {
-            room: {
-                day: list(schedule)
-                for day, schedule in days.items()
-            }
-            for room, days in self.room_schedule.items()
-        }
+        return self.room_schedule
 
-    def export_to_excel(self, filename: str = 'timetable.xlsx'):
-        wb = Workbook()
+    def content_hash(self) -> str:
+        # Stable digest of the input and placements, used as the export's ETag
+        placements = sorted(
+            (self.sections[sid], self.course_names[cid], day, hour, duration, self.rooms[rid], slot_type)
+            for sid, cid, day, hour, duration, rid, slot_type in self.placements
+        )
+        payload = json.dumps([self.input_config(), self.days, placements], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
         
-        # Styles
-        header_fill = PatternFill(start_color="CCE5FF", end_color="CCE5FF", fill_type="solid")
-        theory_fill = PatternFill(start_color="E6F3FF", end_color="E6F3FF", fill_type="solid")
-        lab_fill = PatternFill(start_color="FFE6E6", end_color="FFE6E6", fill_type="solid")
-        break_fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-        makeup_fill = PatternFill(start_color="E6FFE6", end_color="E6FFE6", fill_type="solid")
-        border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                       top=Side(style='thin'), bottom=Side(style='thin'))
-        center_aligned = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        header_font = Font(bold=True)
+    def section_key(self, section_id: int) -> bytes:
+        # The section's cells as raw bytes; an unchanged key means an unchanged sheet
+        start = self.cell(section_id, 0, 0)
+        end = start + len(self.days) * self.hours_per_day
+        return (self.cell_course[start:end].tobytes() + self.cell_room[start:end].tobytes() +
+                self.cell_type[start:end].tobytes())
+
+    def write_workbook(self, target, section_ids: Optional[List[int]] = None):
+        # Write-only workbook: rows are streamed out sheet by sheet with shared styles
+        wb = Workbook(write_only=True)
+        last_column = get_column_letter(len(self.days) + 1)
         
-        for section in self.sections:
-            if section == self.sections[0]:
-                ws = wb.active
-                ws.title = section
-            else:
-                ws = wb.create_sheet(section)
+        def styled(ws, value, fill=None, font=None, border=None):
+            # Assigning a style adds it to the workbook's style tables only once
+            cell = WriteOnlyCell(ws, value)
+            if fill:
+                cell.fill = fill
+            if font:
+                cell.font = font
+            if border:
+                cell.border = border
+            cell.alignment = CENTER_ALIGNED
+            return cell
+
+        registered = False
+        for sid in range(len(self.sections)) if section_ids is None else section_ids:
+            section = self.sections[sid]
+            ws = wb.create_sheet(section)
+            if not registered:
+                # Every style in a fixed order, so a sheet renders to the same XML
+                # in any workbook and cached sheets can be reassembled
+                for fill, font, border in ((HEADER_FILL, TITLE_FONT, None), (HEADER_FILL, HEADER_FONT, None),
+                                           (None, None, BORDER), (SLOT_FILLS[BREAK], None, BORDER),
+                                           (SLOT_FILLS[THEORY], None, BORDER), (SLOT_FILLS[LAB], None, BORDER),
+                                           (SLOT_FILLS[MAKEUP], None, BORDER)):
+                    styled(ws, None, fill, font, border).style_id
+                registered = True
             
-            # Set column widths
+            # Set column widths and row heights
             ws.column_dimensions['A'].width = 10
             for i in range(len(self.days)):
                 col = get_column_letter(i + 2)
                 ws.column_dimensions[col].width = 20
-            
+            for row in range(1, self.hours_per_day + 3):
+                ws.row_dimensions[row].height = 40
+        
             # Write headers
-            ws.merge_cells(f'A1:{get_column_letter(len(self.days) + 1)}1')
-            cell = ws['A1']
-            cell.value = f"Timetable for {section}"
-            cell.fill = header_fill
-            cell.font = Font(bold=True, size=14)
-            cell.alignment = center_aligned
+            ws.merged_cells.add(f'A1:{last_column}1')
+            ws.append([styled(ws, f"Timetable for {section}", HEADER_FILL, TITLE_FONT)])
             
             # Write days
-            for day_idx, day in enumerate(self.days):
-                cell = ws.cell(row=2, column=day_idx + 2)
-                cell.value = day
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = center_aligned
+            ws.append([None] + [styled(ws, day, HEADER_FILL, HEADER_FONT) for day in self.days])
             
-            # Write hours
+            # Write hours and fill schedule
             for hour in range(self.hours_per_day):
-                cell = ws.cell(row=hour + 3, column=1)
-                cell.value = f"Hour {hour + 1}"
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = center_aligned
-            
-            # Fill schedule
-            for day in range(len(self.days)):
-                for hour in range(self.hours_per_day):
-                    cell = ws.cell(row=hour + 3, column=day + 2)
-                    slot = self.timetable[section][day][hour]
-                    
-                    if slot:
-                        cell.value = f"{slot['course']}\n{slot['room']}"
-                        if slot['type'] == 'break':
-                            cell.fill = break_fill
-                        elif slot['type'] == 'lab':
-                            cell.fill = lab_fill
-                        elif slot['type'] == 'makeup':
-                            cell.fill = makeup_fill
-                        else:
-                            cell.fill = theory_fill
+                row = [styled(ws, f"Hour {hour + 1}", HEADER_FILL, HEADER_FONT)]
+                for day in range(len(self.days)):
+                    i = self.cell(sid, day, hour)
+                    slot_type = self.cell_type[i]
+                    if slot_type == FREE:
+                        row.append(styled(ws, "---", border=BORDER))
+                    elif slot_type == BREAK:
+                        row.append(styled(ws, "Break\nBreak", SLOT_FILLS[BREAK], border=BORDER))
                     else:
-                        cell.value = "---"
-                    
-                    cell.border = border
-                    cell.alignment = center_aligned
-            
-            # Set row heights
-            for row in range(1, self.hours_per_day + 3):
-                ws.row_dimensions[row].height = 40
+                        value = f"{self.course_names[self.cell_course[i]]}\n{self.rooms[self.cell_room[i]]}"
+                        row.append(styled(ws, value, SLOT_FILLS[slot_type], border=BORDER))
+                ws.append(row)
         
-        wb.save(filename)
+        wb.save(target)
+
+    def export_to_buffer(self) -> io.BytesIO:
+        """
+        Renders the workbook, re-rendering only the sections whose cells
+        changed since the last export and reassembling the rest from the
+        sheets cached then.
+        """
+        keys = [self.section_key(sid) for sid in range(len(self.sections))]
+        cache = self.export_cache
+        if cache is None:
+            buffer = io.BytesIO()
+            self.write_workbook(buffer)
+            with zipfile.ZipFile(buffer) as archive:
+                parts = {name: archive.read(name) for name in archive.namelist()}
+            self.export_cache = {'parts': parts, 'keys': keys}
+            buffer.seek(0)
+            return buffer
+
+        dirty = [sid for sid, key in enumerate(keys) if key != cache['keys'][sid]]
+        if dirty:
+            patch = io.BytesIO()
+            self.write_workbook(patch, dirty)
+            with zipfile.ZipFile(patch) as archive:
+                # Sheets refer to styles by index into the workbook's style table,
+                # so they only fit the cached workbook if its table is the same
+                if archive.read('xl/styles.xml') != cache['parts']['xl/styles.xml']:
+                    self.export_cache = None
+                    return self.export_to_buffer()
+                for i, sid in enumerate(dirty):
+                    cache['parts'][f"xl/worksheets/sheet{sid + 1}.xml"] = \
+                        archive.read(f"xl/worksheets/sheet{i + 1}.xml")
+                    cache['keys'][sid] = keys[sid]
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, data in cache['parts'].items():
+                archive.writestr(name, data)
+        buffer.seek(0)
+        return buffer
+
+    def export_to_excel(self, filename: str = 'timetable.xlsx'):
+        with open(filename, 'wb') as file:
+            file.write(self.export_to_buffer().getbuffer())
         return f"Timetable exported to {filename}"
 
+# Stop event shared by the workers of a pool, set once per worker process
+_worker_stop = None
+
+def _worker_init(stop):
+    global _worker_stop
+    _worker_stop = stop
+
+def _worker_running(done: int, total: int) -> bool:
+    return _worker_stop is None or not _worker_stop.is_set()
+
+def _poll_workers(futures: List, weights: List[int], stop,
+                  progress: Callable[[int, int], Optional[bool]], interval: float = 1.0):
+    # Reports progress every `interval` seconds as well as when a future finishes,
+    # so a cancel reaches running workers without waiting for one of them to end
+    total = sum(weights)
+    pending = set(futures)
+    while pending:
+        _, pending = wait(pending, timeout=interval, return_when=FIRST_COMPLETED)
+        done = sum(weight for future, weight in zip(futures, weights) if future.done())
+        if progress(done, total) is False:
+            stop.set()
+            for future in pending:
+                future.cancel()
+            return
+
+def _monte_carlo_worker(config: Dict, num_iterations: int, seed: int, mode: str = 'greedy') -> Tuple:
+    scheduler = TimeTable(**config)
+    scheduler.random.seed(seed)
+    return scheduler.run_restarts(num_iterations, _worker_running, mode)
+
+def _cluster_worker(config: Dict, session_rooms: Dict, session_instructor: Dict,
+                    num_iterations: int, seed: int, mode: str) -> Tuple:
+    scheduler = TimeTable(**config)
+    scheduler.random.seed(seed)
+    scheduler.session_rooms = session_rooms
+    scheduler.session_instructor = session_instructor
+    return scheduler.run_restarts(num_iterations, _worker_running, mode)
+
+def _portfolio_worker(config: Dict, strategy: Dict, seed: int, deadline: float,
+                      first_feasible: bool) -> Tuple:
+    # Runs one strategy until it is done, stopped or past the wall-clock deadline
+    started = time.time()
+    scheduler = TimeTable(**config)
+    scheduler.random.seed(seed)
+
+    def progress(done: int, total: int) -> bool:
+        return _worker_running(done, total) and time.time() < deadline
+
+    if strategy['mode'] == 'search':
+        results = scheduler.search_timetable(strategy.get('max_nodes', 100000),
+                                             max(0.0, deadline - time.time()), progress)
+        solved = results['status'] == 'solved'
+        stats = {'total_attempts': 1, 'successful_attempts': int(solved), 'failed_attempts': int(not solved)}
+        score, snapshot = (results['best_score'], scheduler.snapshot()) if solved else (float('-inf'), None)
+    else:
+        stats, score, snapshot = scheduler.run_restarts(strategy.get('num_iterations', 1000), progress,
+                                                        strategy['mode'], until_success=first_feasible)
+    return stats, score, snapshot, time.time() - started
+
 if __name__ == "__main__":
     scheduler = TimeTable()
     results = scheduler.monte_carlo_simulation()
@@ -450,4 +1670,4 @@ if __name__ == "__main__":
         print(f"Success rate: {results['success_rate']:.2f}%")
         print(f"Best score: {results['best_score']:.2f}")
     else:
-        print("Failed to generate timetable")
\ No newline at end of file
+        print("Failed to generate timetable")
@@ -1,20 +1,186 @@
-from flask import Flask, request, jsonify, render_template, send_file
+from flask import Flask, request, jsonify, render_template, send_file, session
 import os
 import json
+import uuid
 from TimeTable import TimeTable
+from jobs import JobQueue
+from store import TimeTableStore
+from database import TimeTableDatabase
+from cache import ResultCache
 
 app = Flask(__name__)
 
-# Global variable to store the current timetable instance
-current_timetable = None
+DB_PATH = os.environ.get('TIMETABLE_DB_PATH', os.path.join(app.root_path, 'timetables.db'))
+
+def load_secret_key(path):
+    # Sessions only name a stored timetable, so the key signing them has to
+    # survive restarts and be shared by every worker: created once, then reused
+    try:
+        with open(path, 'rb') as file:
+            return file.read()
+    except FileNotFoundError:
+        pass
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as file:
+        file.write(os.urandom(24))
+    try:
+        # Linking fails if another worker created the key first; theirs wins
+        os.link(tmp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.remove(tmp_path)
+    with open(path, 'rb') as file:
+        return file.read()
+
+app.secret_key = (os.environ.get('TIMETABLE_SECRET_KEY') or
+                  load_secret_key(os.path.join(os.path.dirname(DB_PATH), 'secret_key')))
+
+# Every generated timetable as indexed assignment rows, kept across restarts
+timetable_db = TimeTableDatabase(DB_PATH)
+
+# Generated timetables, keyed per session; least recently used ones spill to disk
+timetable_store = TimeTableStore(
+    os.environ.get('TIMETABLE_STORE_DIR', os.path.join(app.root_path, 'timetable_store')),
+    max_entries=int(os.environ.get('TIMETABLE_STORE_ENTRIES', 64)),
+    max_bytes=int(os.environ.get('TIMETABLE_STORE_BYTES', 64 * 1024 * 1024)),
+    ttl=float(os.environ.get('TIMETABLE_STORE_TTL', 1800)),
+    database=timetable_db
+)
+
+# Process-pool size for Monte Carlo restarts (override per request with 'workers')
+GENERATE_WORKERS = int(os.environ.get('TIMETABLE_WORKERS', os.cpu_count() or 1))
+
+# Shared deadline in seconds for the 'portfolio' mode (override per request with 'deadline')
+PORTFOLIO_DEADLINE = float(os.environ.get('TIMETABLE_PORTFOLIO_DEADLINE', 30))
+
+# Best assignments of earlier runs, keyed by normalized input and solver settings
+result_cache = ResultCache(
+    os.environ.get('TIMETABLE_CACHE_DIR', os.path.join(app.root_path, 'result_cache')),
+    max_entries=int(os.environ.get('TIMETABLE_CACHE_ENTRIES', 256))
+)
+
+# Background generation jobs
+job_queue = JobQueue(max_workers=int(os.environ.get('TIMETABLE_JOB_WORKERS', 2)))
 
 @app.route('/')
 def index():
     return render_template('timetable.html')
 
+def worker_count(data, field='workers'):
+    # Process counts come from the request, so they are held to the configured pool size
+    value = int(data.get(field, GENERATE_WORKERS))
+    if not 1 <= value <= GENERATE_WORKERS:
+        raise ValueError(f"'{field}' must be between 1 and {GENERATE_WORKERS}")
+    return value
+
+def solver_settings(data):
+    # Optional annealing stage run over the generated timetable (0 disables it)
+    improve_iterations = int(data.get('improve_iterations', 0))
+    if data.get('mode') == 'search':
+        return {'mode': 'search', 'max_nodes': 100000, 'improve_iterations': improve_iterations}
+    if data.get('mode') == 'decompose':
+        # Solve clusters of sections in parallel, then merge and repair
+        workers = worker_count(data)
+        return {
+            'mode': 'decompose',
+            'clusters': int(data.get('clusters', workers)),
+            'workers': workers,
+            'seed': data.get('seed'),
+            'improve_iterations': improve_iterations
+        }
+    if data.get('mode') == 'portfolio':
+        # Race restarts, repair and search under one deadline in seconds
+        return {
+            'mode': 'portfolio',
+            'deadline': float(data.get('deadline', PORTFOLIO_DEADLINE)),
+            'seed': data.get('seed'),
+            'improve_iterations': improve_iterations
+        }
+    # 'repair' runs the same restarts but repairs failed attempts instead of discarding them
+    return {
+        'mode': 'repair' if data.get('mode') == 'repair' else 'monte_carlo',
+        'num_iterations': 1000,
+        'workers': worker_count(data),
+        'seed': data.get('seed'),
+        'improve_iterations': improve_iterations
+    }
+
+def generation_result(timetable_id, results):
+    return {
+        'success': True,
+        'message': 'Timetable generated successfully!',
+        'timetable_id': timetable_id,
+        'stats': {
+            'success_rate': f"{results['success_rate']:.2f}%",
+            'best_score': f"{results['best_score']:.2f}",
+            'filename': f"{timetable_id}.xlsx",
+            **({'strategy': results['winner']} if results.get('winner') else {})
+        }
+    }
+
+def run_generation(job, timetable_id, timetable, settings, cache_key):
+    if settings['mode'] == 'search':
+        # Single constraint-propagating backtracking search
+        results = timetable.search_timetable(settings['max_nodes'], progress=job.report)
+    elif settings['mode'] == 'decompose':
+        results = timetable.decompose_timetable(
+            clusters=settings['clusters'],
+            workers=settings['workers'],
+            seed=settings['seed'],
+            progress=job.report
+        )
+    elif settings['mode'] == 'portfolio':
+        results = timetable.run_portfolio(
+            deadline=settings['deadline'],
+            seed=settings['seed'],
+            progress=job.report
+        )
+        # Which strategy wins on which input guides the default settings
+        app.logger.info('Portfolio winner for %s: %s', timetable_id, timetable.portfolio_stats)
+    else:
+        # Run Monte Carlo simulation
+        results = timetable.monte_carlo_simulation(
+            num_iterations=settings['num_iterations'],
+            workers=settings['workers'],
+            seed=settings['seed'],
+            progress=job.report,
+            mode='repair' if settings['mode'] == 'repair' else 'greedy'
+        )
+
+    if results['success_rate'] > 0 and settings['improve_iterations'] > 0 \
+            and not job.cancel_requested.is_set():
+        # Polish the best timetable with simulated annealing and tabu moves
+        improved = timetable.improve_timetable(
+            settings['improve_iterations'],
+            seed=settings.get('seed'),
+            progress=job.report
+        )
+        results = dict(results, best_score=improved['best_score'])
+
+    if job.cancel_requested.is_set():
+        return {
+            'success': False,
+            'message': 'Timetable generation was cancelled'
+        }
+
+    if results['success_rate'] > 0:
+        # The workbook is rendered on download, straight from the stored timetable
+        timetable_store.put(timetable_id, timetable)
+        result_cache.put(cache_key, {
+            'assignments': timetable.assignments(),
+            'results': results
+        })
+        return generation_result(timetable_id, results)
+
+    return {
+        'success': False,
+        'message': 'Failed to generate a valid timetable',
+        'stats': results
+    }
+
 @app.route('/generate', methods=['POST'])
 def generate_timetable():
-    global current_timetable
     try:
         data = request.json
         
@@ -26,36 +192,111 @@ def generate_timetable():
             }), 400
 
         # Create scheduler instance with provided data
-        current_timetable = TimeTable(
+        timetable = TimeTable(
             sections=data['sections'],
             courses=data['courses'],
             theory_rooms=data.get('theory_rooms'),
-            lab_rooms=data.get('lab_rooms')
+            lab_rooms=data.get('lab_rooms'),
+            instructors=data.get('instructors'),
+            room_details=data.get('room_details'),
+            course_details=data.get('course_details'),
+            section_sizes=data.get('section_sizes')
         )
+
+        # Reject provably infeasible input before queueing any attempts
+        problems = timetable.check_feasibility()
+        if problems:
+            return jsonify({
+                'success': False,
+                'message': f"Infeasible input: {problems[0]['message']}",
+                'binding_resource': problems[0],
+                'problems': problems
+            }), 400
         
-        # Run Monte Carlo simulation
-        results = current_timetable.monte_carlo_simulation(num_iterations=1000)
-        
-        if results['success_rate'] > 0:
-            filename = "generated_timetable.xlsx"
-            filepath = os.path.join(app.root_path, filename)
-            current_timetable.export_to_excel(filepath)
-            
+        # Identical input and settings reuse the earlier best assignment
+        settings = solver_settings(data)
+
+        # This session's makeup requests will act on this timetable
+        timetable_id = uuid.uuid4().hex
+        session['timetable_id'] = timetable_id
+
+        cache_key = result_cache.key(data, settings)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            timetable.load_assignments(cached['assignments'])
+            timetable_store.put(timetable_id, timetable)
+            result = dict(generation_result(timetable_id, cached['results']), cached=True)
+            job = job_queue.completed(result)
             return jsonify({
                 'success': True,
-                'message': 'Timetable generated successfully!',
-                'stats': {
-                    'success_rate': f"{results['success_rate']:.2f}%",
-                    'best_score': f"{results['best_score']:.2f}",
-                    'filename': filename
-                }
+                'message': 'Timetable loaded from cache',
+                'job_id': job.id,
+                'status': job.status,
+                'result': result
             })
-        
+
+        # Generate in the background and hand back a job id to poll
+        job = job_queue.submit(
+            lambda job: run_generation(job, timetable_id, timetable, settings, cache_key))
+        return jsonify({
+            'success': True,
+            'message': 'Timetable generation queued',
+            'job_id': job.id,
+            'status': job.status
+        }), 202
+
+    except ValueError as e:
+        # Out-of-range solver settings
         return jsonify({
             'success': False,
-            'message': 'Failed to generate a valid timetable',
-            'stats': results
-        })
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+@app.route('/resolve', methods=['POST'])
+def resolve_timetable():
+    # Re-solve a stored timetable after its input changed, keeping what still fits
+    try:
+        data = request.json
+        previous_id = data.get('timetable_id') or session.get('timetable_id')
+        with timetable_store.use(previous_id) as previous:
+            if previous is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'No timetable exists. Please generate a timetable first.'
+                }), 400
+
+            # Fields left out keep their previous values, the instructor of each
+            # (section, course) pair included
+            config = previous.input_config()
+            config.update({field: data[field] for field in config if data.get(field) is not None})
+            timetable = TimeTable(**config)
+
+            problems = timetable.check_feasibility()
+            if problems:
+                return jsonify({
+                    'success': False,
+                    'message': f"Infeasible input: {problems[0]['message']}",
+                    'binding_resource': problems[0],
+                    'problems': problems
+                }), 400
+
+            results = timetable.resolve_timetable(previous.assignments(), seed=data.get('seed'))
+            if not results['success_rate']:
+                return jsonify({
+                    'success': False,
+                    'message': 'Failed to re-solve the timetable',
+                    'stats': timetable.resolve_stats
+                })
+
+            timetable_id = uuid.uuid4().hex
+            session['timetable_id'] = timetable_id
+            timetable_store.put(timetable_id, timetable)
+            return jsonify(dict(generation_result(timetable_id, results), changes=timetable.resolve_stats))
 
     except Exception as e:
         return jsonify({
@@ -63,16 +304,77 @@ def generate_timetable():
             'message': f'Error: {str(e)}'
         }), 500
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': 'Job not found'
+        }), 404
+    status = job.to_dict()
+    if job.status == 'done':
+        status['result'] = job.result
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': 'Job not found'
+        }), 404
+    if job.status == 'done':
+        return jsonify(job.result)
+    if job.status == 'failed':
+        return jsonify({
+            'success': False,
+            'message': f'Error: {job.error}'
+        }), 500
+    if job.status == 'cancelled':
+        return jsonify({
+            'success': False,
+            'message': 'Timetable generation was cancelled'
+        }), 409
+    return jsonify(job.to_dict()), 202
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': 'Job not found'
+        }), 404
+    return jsonify(job.to_dict())
+
 @app.route('/download/<filename>')
 def download_file(filename):
     try:
-        filepath = os.path.join(app.root_path, filename)
-        if not os.path.exists(filepath):
-            return jsonify({
-                'success': False,
-                'message': 'Timetable file not found. Please generate a timetable first.'
-            }), 404
-        return send_file(filepath, as_attachment=True)
+        timetable_id = filename[:-len('.xlsx')] if filename.endswith('.xlsx') else filename
+        with timetable_store.use(timetable_id) as timetable:
+            if timetable is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'Timetable file not found. Please generate a timetable first.'
+                }), 404
+
+            # Unchanged timetables answer conditional GETs without re-exporting
+            etag = timetable.content_hash()
+            if request.if_none_match.contains(etag):
+                response = app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+
+            return send_file(
+                timetable.export_to_buffer(),
+                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                as_attachment=True,
+                download_name=filename,
+                etag=etag,
+                max_age=0
+            )
     except Exception as e:
         return jsonify({
             'success': False,
@@ -81,42 +383,351 @@ def download_file(filename):
 
 @app.route('/add-makeup', methods=['POST'])
 def add_makeup_class():
-    global current_timetable
     try:
-        if current_timetable is None:
+        data = request.json
+        timetable_id = data.get('timetable_id') or session.get('timetable_id')
+        with timetable_store.use(timetable_id) as current_timetable:
+            if current_timetable is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'No timetable exists. Please generate a timetable first.'
+                }), 400
+
+            required_fields = ['section', 'course', 'is_lab']
+            if not all(field in data for field in required_fields):
+                return jsonify({
+                    'success': False,
+                    'message': 'Missing required fields'
+                }), 400
+
+            success = current_timetable.add_makeup_class(
+                data['section'],
+                data['course'],
+                data.get('is_lab', False)
+            )
+
+            if success:
+                filename = f"{timetable_id}.xlsx"
+                timetable_store.touch(timetable_id, current_timetable)
+                return jsonify({
+                    'success': True,
+                    'message': 'Makeup class added successfully!',
+                    'filename': filename
+                })
+        
             return jsonify({
                 'success': False,
-                'message': 'No timetable exists. Please generate a timetable first.'
-            }), 400
+                'message': 'Could not find suitable slot for makeup class'
+            })
 
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+@app.route('/add-makeup/batch', methods=['POST'])
+def add_makeup_classes():
+    try:
         data = request.json
-        required_fields = ['section', 'course', 'is_lab']
-        if not all(field in data for field in required_fields):
+        timetable_id = data.get('timetable_id') or session.get('timetable_id')
+        with timetable_store.use(timetable_id) as current_timetable:
+            if current_timetable is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'No timetable exists. Please generate a timetable first.'
+                }), 400
+
+            makeups = data.get('makeups')
+            if not isinstance(makeups, list):
+                return jsonify({
+                    'success': False,
+                    'message': 'Missing required field: makeups'
+                }), 400
+
+            # Invalid items are reported per item; the rest are placed in one pass
+            required_fields = ['section', 'course', 'is_lab']
+            valid = [
+                makeup for makeup in makeups
+                if all(field in makeup for field in required_fields)
+                and makeup['section'] in current_timetable.section_ids
+            ]
+            slots = iter(current_timetable.add_makeup_classes(valid))
+
+            results = []
+            for makeup in makeups:
+                if not all(field in makeup for field in required_fields):
+                    results.append({'success': False, 'message': 'Missing required fields'})
+                    continue
+                if makeup['section'] not in current_timetable.section_ids:
+                    results.append({'success': False, 'message': f"Unknown section: {makeup['section']}"})
+                    continue
+                slot = next(slots)
+                if slot is None:
+                    results.append({
+                        'success': False,
+                        'message': 'Could not find suitable slot for makeup class'
+                    })
+                    continue
+                day, hour, room = slot
+                results.append({
+                    'success': True,
+                    'day': current_timetable.days[day],
+                    'hour': hour + 1,
+                    'room': room
+                })
+
+            placed = sum(1 for result in results if result['success'])
+            if placed:
+                timetable_store.touch(timetable_id, current_timetable)
             return jsonify({
-                'success': False,
-                'message': 'Missing required fields'
-            }), 400
+                'success': placed > 0,
+                'message': f'{placed} of {len(makeups)} makeup classes added',
+                'filename': f"{timetable_id}.xlsx",
+                'results': results
+            })
 
-        success = current_timetable.add_makeup_class(
-            data['section'],
-            data['course'],
-            data.get('is_lab', False)
-        )
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+def slot_index(timetable, day, hour):
+    # Day names (or indexes) and 1-based hours, as in the makeup responses
+    day = timetable.days.index(day) if day in timetable.days else int(day)
+    if not 0 <= day < len(timetable.days):
+        raise ValueError(f"Unknown day: {day}")
+    hour = int(hour)
+    if not 1 <= hour <= timetable.hours_per_day:
+        raise ValueError(f"Unknown hour: {hour}")
+    return day, hour - 1
+
+def edit_response(timetable, timetable_id, result, apply):
+    if not result['valid']:
+        return jsonify({'success': False, 'message': result['message']})
+    if apply:
+        timetable_store.touch(timetable_id, timetable)
+    return jsonify({
+        'success': True,
+        'applied': apply,
+        'score_delta': result['score_delta'],
+        'score': result['score'],
+        'moves': [dict(move, day=timetable.days[move['day']], hour=move['hour'] + 1)
+                  for move in result['moves']],
+        'filename': f"{timetable_id}.xlsx"
+    })
+
+@app.route('/edit/move', methods=['POST'])
+def move_session():
+    # Move one session; 'dry_run' only validates and scores it, e.g. while dragging
+    try:
+        data = request.json
+        timetable_id = data.get('timetable_id') or session.get('timetable_id')
+        with timetable_store.use(timetable_id) as current_timetable:
+            if current_timetable is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'No timetable exists. Please generate a timetable first.'
+                }), 400
+
+            required_fields = ['section', 'day', 'hour', 'to_day', 'to_hour']
+            if not all(field in data for field in required_fields):
+                return jsonify({
+                    'success': False,
+                    'message': 'Missing required fields'
+                }), 400
+            if data['section'] not in current_timetable.section_ids:
+                return jsonify({
+                    'success': False,
+                    'message': f"Unknown section: {data['section']}"
+                }), 400
 
-        if success:
-            filename = "updated_timetable.xlsx"
-            filepath = os.path.join(app.root_path, filename)
-            current_timetable.export_to_excel(filepath)
+            apply = not data.get('dry_run', False)
+            result = current_timetable.move_session(
+                data['section'],
+                *slot_index(current_timetable, data['day'], data['hour']),
+                *slot_index(current_timetable, data['to_day'], data['to_hour']),
+                room=data.get('room'),
+                apply=apply
+            )
+            return edit_response(current_timetable, timetable_id, result, apply)
+
+    except ValueError as e:
+        # Unknown day or hour
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+@app.route('/edit/swap', methods=['POST'])
+def swap_sessions():
+    # Swap two sessions of the same length ('other_section' defaults to 'section')
+    try:
+        data = request.json
+        timetable_id = data.get('timetable_id') or session.get('timetable_id')
+        with timetable_store.use(timetable_id) as current_timetable:
+            if current_timetable is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'No timetable exists. Please generate a timetable first.'
+                }), 400
+
+            required_fields = ['section', 'day', 'hour', 'other_day', 'other_hour']
+            if not all(field in data for field in required_fields):
+                return jsonify({
+                    'success': False,
+                    'message': 'Missing required fields'
+                }), 400
+            other_section = data.get('other_section', data['section'])
+            for section in (data['section'], other_section):
+                if section not in current_timetable.section_ids:
+                    return jsonify({
+                        'success': False,
+                        'message': f"Unknown section: {section}"
+                    }), 400
+
+            apply = not data.get('dry_run', False)
+            result = current_timetable.swap_sessions(
+                data['section'],
+                *slot_index(current_timetable, data['day'], data['hour']),
+                other_section,
+                *slot_index(current_timetable, data['other_day'], data['other_hour']),
+                apply=apply
+            )
+            return edit_response(current_timetable, timetable_id, result, apply)
+
+    except ValueError as e:
+        # Unknown day or hour
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+def query_timetable_id():
+    return request.args.get('timetable_id') or session.get('timetable_id')
+
+def query_duration(timetable):
+    # Window length in hours, from one hour up to a whole day
+    duration = int(request.args.get('duration', 1))
+    if not 1 <= duration <= timetable.hours_per_day:
+        raise ValueError(f"Invalid duration: {duration}")
+    return duration
+
+@app.route('/query/free-rooms')
+def free_rooms():
+    # Rooms free on a day from a 1-based hour, for 'duration' hours (default 1)
+    try:
+        with timetable_store.use(query_timetable_id()) as current_timetable:
+            if current_timetable is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'No timetable exists. Please generate a timetable first.'
+                }), 400
+            if 'day' not in request.args or 'hour' not in request.args:
+                return jsonify({
+                    'success': False,
+                    'message': 'Missing required parameters (day, hour)'
+                }), 400
+
+            kind = request.args.get('kind')
+            if kind not in (None, 'theory', 'lab'):
+                return jsonify({
+                    'success': False,
+                    'message': f"Unknown room kind: {kind}"
+                }), 400
+            day, hour = slot_index(current_timetable, request.args['day'], request.args['hour'])
             return jsonify({
                 'success': True,
-                'message': 'Makeup class added successfully!',
-                'filename': filename
+                'rooms': current_timetable.query_free_rooms(
+                    day, hour,
+                    duration=query_duration(current_timetable),
+                    kind=kind,
+                    min_capacity=int(request.args.get('min_capacity', 0))
+                )
             })
-        
+
+    except ValueError as e:
+        # Unknown day, hour or duration
         return jsonify({
             'success': False,
-            'message': 'Could not find suitable slot for makeup class'
-        })
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+@app.route('/query/free-slots')
+def free_slots():
+    # Common free start hours of comma-separated sections, per day
+    try:
+        with timetable_store.use(query_timetable_id()) as current_timetable:
+            if current_timetable is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'No timetable exists. Please generate a timetable first.'
+                }), 400
+
+            sections = [section for section in request.args.get('sections', '').split(',') if section]
+            if not sections:
+                return jsonify({
+                    'success': False,
+                    'message': 'Missing required parameter: sections'
+                }), 400
+            unknown = [section for section in sections if section not in current_timetable.section_ids]
+            if unknown:
+                return jsonify({
+                    'success': False,
+                    'message': f"Unknown section: {unknown[0]}"
+                }), 400
+
+            slots = current_timetable.query_free_slots(sections, query_duration(current_timetable))
+            return jsonify({
+                'success': True,
+                'slots': {
+                    day: [hour + 1 for hour in hours]
+                    for day, hours in zip(current_timetable.days, slots)
+                }
+            })
+
+    except ValueError as e:
+        # Invalid duration
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+@app.route('/timetables')
+def list_timetables():
+    return jsonify({'success': True, 'timetables': timetable_db.timetables()})
+
+def lookup_response(timetable_id, **filters):
+    # Read-only lookups straight from the database, without building a TimeTable
+    try:
+        slots = timetable_db.lookup(timetable_id, **filters)
+        if slots is None:
+            return jsonify({
+                'success': False,
+                'message': 'Timetable not found'
+            }), 404
+        return jsonify({'success': True, 'timetable_id': timetable_id, 'slots': slots})
 
     except Exception as e:
         return jsonify({
@@ -124,5 +735,30 @@ def add_makeup_class():
             'message': f'Error: {str(e)}'
         }), 500
 
+@app.route('/timetables/<timetable_id>/sections/<section>')
+def section_lookup(timetable_id, section):
+    return lookup_response(timetable_id, section=section)
+
+@app.route('/timetables/<timetable_id>/rooms/<room>')
+def room_lookup(timetable_id, room):
+    return lookup_response(timetable_id, room=room)
+
+@app.route('/timetables/<timetable_id>/slots')
+def slot_lookup(timetable_id):
+    # Everything scheduled on a day name (or index) and, optionally, a 1-based hour
+    days = timetable_db.days(timetable_id) or []
+    day = request.args.get('day')
+    hour = request.args.get('hour')
+    try:
+        if day is not None:
+            day = days.index(day) if day in days else int(day)
+        hour = int(hour) - 1 if hour is not None else None
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid day or hour'
+        }), 400
+    return lookup_response(timetable_id, day=day, hour=hour)
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
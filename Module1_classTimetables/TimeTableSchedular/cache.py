@@ -0,0 +1,94 @@
+from typing import Dict, Optional, List
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+
+
+class ResultCache:
+    """
+    Content-addressed cache of generation results.
+
+    Entries are keyed by a hash of the normalized input plus the solver
+    settings, hold the best assignment and its stats, and are persisted
+    one file per key in `directory` so they survive restarts. The least
+    recently used entries are deleted beyond max_entries.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 256):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        # Rebuild LRU order from file modification times
+        files = [name for name in os.listdir(directory) if name.endswith('.json')]
+        files.sort(key=lambda name: os.path.getmtime(os.path.join(directory, name)))
+        self.keys: 'OrderedDict[str, None]' = OrderedDict(
+            (name[:-len('.json')], None) for name in files
+        )
+        self.evict()
+
+    @staticmethod
+    def normalize(data: Dict) -> Dict:
+        # The order of sections, rooms and courses does not change the problem
+        def names(values: Optional[List]) -> Optional[List[str]]:
+            return sorted(str(value) for value in values) if values else None
+
+        return {
+            'sections': names(data.get('sections')),
+            'courses': {
+                str(name): {
+                    'theory': int(hours.get('theory', 0)),
+                    'lab': int(hours.get('lab', 0))
+                }
+                for name, hours in (data.get('courses') or {}).items()
+            },
+            'theory_rooms': names(data.get('theory_rooms')),
+            'lab_rooms': names(data.get('lab_rooms')),
+            'instructors': sorted(data.get('instructors') or [], key=lambda item: str(item.get('id'))),
+            'room_details': sorted(data.get('room_details') or [], key=lambda item: str(item.get('name'))),
+            'course_details': sorted(data.get('course_details') or [], key=lambda item: str(item.get('name'))),
+            'section_sizes': data.get('section_sizes') or {}
+        }
+
+    @classmethod
+    def key(cls, data: Dict, settings: Dict) -> str:
+        payload = json.dumps([cls.normalize(data), settings], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            if key not in self.keys:
+                return None
+            try:
+                with open(self.path(key)) as file:
+                    entry = json.load(file)
+            except (OSError, ValueError):
+                self.keys.pop(key, None)
+                return None
+            self.keys.move_to_end(key)
+            os.utime(self.path(key))
+            return entry
+
+    def put(self, key: str, entry: Dict):
+        with self.lock:
+            tmp_path = f"{self.path(key)}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump(entry, file, separators=(',', ':'))
+            os.replace(tmp_path, self.path(key))
+            self.keys[key] = None
+            self.keys.move_to_end(key)
+            self.evict()
+
+    def evict(self):
+        while len(self.keys) > self.max_entries:
+            key, _ = self.keys.popitem(last=False)
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
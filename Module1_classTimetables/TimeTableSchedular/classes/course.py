@@ -19,4 +19,12 @@ class Course:
         self.possible_rooms.append(room)
 
     def add_possible_instructor(self, instructor):
-        self.possible_instructors.append(instructor)
\ No newline at end of file
+        self.possible_instructors.append(instructor)
+
+    def to_dict(self):
+        # Instructors and rooms by id and name, whether stored as objects or plain values
+        return {
+            'name': self.name,
+            'instructors': [getattr(instructor, 'id', instructor) for instructor in self.possible_instructors],
+            'rooms': [getattr(room, 'name', room) for room in self.possible_rooms]
+        }
\ No newline at end of file
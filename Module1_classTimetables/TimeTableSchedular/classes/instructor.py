@@ -16,4 +16,7 @@ class Instructor:
     def remove_course(self, time_slot):
         if not (0 <= time_slot < 7):
             raise ValueError("Time Slot Out of Range")
-        self.availability[time_slot] = True
\ No newline at end of file
+        self.availability[time_slot] = True
+
+    def to_dict(self):
+        return {'id': self.id, 'availability': list(self.availability)}
\ No newline at end of file
@@ -1,9 +1,13 @@
 class Room:
-    def __init__(self, name):
+    def __init__(self, name, capacity=None):
         self.name = name
+        self.capacity = capacity
         self.availability = {}
 
     def add_availability(self, time_slot, is_available):
         if not (0 <= time_slot < 7):
             raise ValueError("Time Slot Out of Range")
-        self.availability[time_slot] = is_available
\ No newline at end of file
+        self.availability[time_slot] = is_available
+
+    def to_dict(self):
+        return {'name': self.name, 'capacity': self.capacity, 'availability': dict(self.availability)}
\ No newline at end of file
@@ -0,0 +1,167 @@
+from typing import Dict, List, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+from TimeTable import TimeTable, SLOT_TYPES
+
+
+class TimeTableDatabase:
+    """
+    Generated timetables persisted in SQLite, one row per occupied
+    (section, day, hour), so read-only lookups by section, room or time are
+    answered from the indexes without building a TimeTable.
+
+    Each timetable also keeps its input and course names, which is enough to
+    rebuild the full TimeTable after a restart. Connections are per thread;
+    the database runs in WAL mode so readers do not wait for writers.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS timetables (
+            id TEXT PRIMARY KEY,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            score REAL NOT NULL,
+            days TEXT NOT NULL,
+            config TEXT NOT NULL,
+            course_names TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS assignments (
+            timetable_id TEXT NOT NULL REFERENCES timetables(id) ON DELETE CASCADE,
+            section TEXT NOT NULL,
+            day INTEGER NOT NULL,
+            hour INTEGER NOT NULL,
+            course TEXT NOT NULL,
+            room TEXT NOT NULL,
+            slot_type INTEGER NOT NULL,
+            start_hour INTEGER NOT NULL,
+            duration INTEGER NOT NULL,
+            PRIMARY KEY (timetable_id, section, day, hour)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS assignments_room ON assignments (timetable_id, room, day, hour);
+        CREATE INDEX IF NOT EXISTS assignments_slot ON assignments (timetable_id, day, hour);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection().executescript(self.SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA foreign_keys=ON')
+            self.local.connection = connection
+        return connection
+
+    def save(self, timetable_id: str, timetable: TimeTable):
+        # Writes the timetable in one transaction. After the first save only the
+        # rows of placements added or removed since the last one are written
+        placements = frozenset(timetable.placements)
+        saved = timetable.saved_rows
+        now = time.time()
+        with self.connection() as connection:
+            if saved is None or saved[0] != timetable_id:
+                connection.execute(
+                    """INSERT INTO timetables (id, created_at, updated_at, score, days, config, course_names)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(id) DO UPDATE SET updated_at = excluded.updated_at,
+                           score = excluded.score, course_names = excluded.course_names""",
+                    (timetable_id, now, now, timetable.score, json.dumps(timetable.days),
+                     json.dumps(timetable.input_config()), json.dumps(timetable.course_names))
+                )
+                connection.execute('DELETE FROM assignments WHERE timetable_id = ?', (timetable_id,))
+                removed, added = (), placements
+            else:
+                if len(timetable.course_names) != saved[2]:
+                    connection.execute('UPDATE timetables SET course_names = ? WHERE id = ?',
+                                       (json.dumps(timetable.course_names), timetable_id))
+                connection.execute('UPDATE timetables SET updated_at = ?, score = ? WHERE id = ?',
+                                   (now, timetable.score, timetable_id))
+                removed, added = saved[1] - placements, placements - saved[1]
+            connection.executemany(
+                'DELETE FROM assignments WHERE timetable_id = ? AND section = ? AND day = ? AND hour = ?',
+                [(timetable_id, timetable.sections[sid], day, hour)
+                 for sid, _, day, start_hour, duration, _, _ in removed
+                 for hour in range(start_hour, start_hour + duration)]
+            )
+            connection.executemany(
+                'INSERT INTO assignments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(timetable_id, timetable.sections[sid], day, hour, timetable.course_names[cid],
+                  timetable.rooms[rid], slot_type, start_hour, duration)
+                 for sid, cid, day, start_hour, duration, rid, slot_type in added
+                 for hour in range(start_hour, start_hour + duration)]
+            )
+        timetable.saved_rows = (timetable_id, placements, len(timetable.course_names))
+
+    def load(self, timetable_id: str) -> Optional[TimeTable]:
+        row = self.connection().execute(
+            'SELECT config, course_names FROM timetables WHERE id = ?', (timetable_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        placements = self.connection().execute(
+            """SELECT section, course, day, start_hour, duration, room, slot_type FROM assignments
+               WHERE timetable_id = ? AND hour = start_hour""",
+            (timetable_id,)
+        ).fetchall()
+        timetable = TimeTable(**json.loads(row['config']))
+        for cid, name in enumerate(json.loads(row['course_names'])):
+            if timetable.course_id(name) != cid:
+                raise ValueError(f"Course id mismatch while loading '{name}'")
+        timetable.load_assignments([list(placement) for placement in placements])
+        timetable.saved_rows = (timetable_id, frozenset(timetable.placements), len(timetable.course_names))
+        return timetable
+
+    def delete(self, timetable_id: str):
+        with self.connection() as connection:
+            connection.execute('DELETE FROM timetables WHERE id = ?', (timetable_id,))
+
+    def timetables(self) -> List[Dict]:
+        rows = self.connection().execute(
+            'SELECT id, created_at, updated_at, score FROM timetables ORDER BY created_at DESC'
+        ).fetchall()
+        return [
+            {'timetable_id': row['id'], 'created_at': row['created_at'],
+             'updated_at': row['updated_at'], 'score': row['score']}
+            for row in rows
+        ]
+
+    def days(self, timetable_id: str) -> Optional[List[str]]:
+        row = self.connection().execute(
+            'SELECT days FROM timetables WHERE id = ?', (timetable_id,)
+        ).fetchone()
+        return json.loads(row['days']) if row is not None else None
+
+    def lookup(self, timetable_id: str, section: Optional[str] = None, room: Optional[str] = None,
+               day: Optional[int] = None, hour: Optional[int] = None) -> Optional[List[Dict]]:
+        """
+        Occupied hours of a timetable matching the given section, room, day
+        and hour (0-based), ordered by day and hour; None for an unknown id.
+        """
+        days = self.days(timetable_id)
+        if days is None:
+            return None
+        conditions, values = ['timetable_id = ?'], [timetable_id]
+        for column, value in (('section', section), ('room', room), ('day', day), ('hour', hour)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        rows = self.connection().execute(
+            f"""SELECT section, day, hour, course, room, slot_type FROM assignments
+                WHERE {' AND '.join(conditions)} ORDER BY day, hour, section""",
+            values
+        ).fetchall()
+        return [
+            {'section': row['section'], 'day': days[row['day']], 'hour': row['hour'] + 1,
+             'course': row['course'], 'room': row['room'], 'type': SLOT_TYPES[row['slot_type']]}
+            for row in rows
+        ]
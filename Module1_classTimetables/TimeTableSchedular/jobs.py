@@ -0,0 +1,99 @@
+from typing import Dict, Optional, Callable, Any
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import threading
+import time
+import uuid
+
+
+class Job:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'
+        self.progress = 0.0
+        self.result: Optional[Any] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = threading.Event()
+        self.future = None
+
+    def report(self, done: int, total: int) -> bool:
+        # Progress callback for the solvers; returning False asks them to stop
+        self.progress = done / total if total else 1.0
+        return not self.cancel_requested.is_set()
+
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'progress': round(self.progress * 100, 2),
+            'error': self.error
+        }
+
+
+class JobQueue:
+    """
+    Runs timetable generation in a local thread pool so requests can return
+    a job id straight away. Finished jobs are kept for polling until
+    max_finished newer ones have completed.
+    """
+
+    def __init__(self, max_workers: int = 2, max_finished: int = 1000):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_finished = max_finished
+        self.jobs: Dict[str, Job] = {}
+        self.finished: 'OrderedDict[str, None]' = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, fn: Callable[[Job], Any]) -> Job:
+        job = Job()
+        with self.lock:
+            self.jobs[job.id] = job
+        job.future = self.executor.submit(self._run, job, fn)
+        return job
+
+    def completed(self, result: Any) -> Job:
+        # Register an already finished job, e.g. for a cached result
+        job = Job()
+        job.result = result
+        with self.lock:
+            self.jobs[job.id] = job
+        self._finish(job, 'done')
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]):
+        if job.cancel_requested.is_set():
+            self._finish(job, 'cancelled')
+            return
+        job.status = 'running'
+        try:
+            job.result = fn(job)
+            self._finish(job, 'cancelled' if job.cancel_requested.is_set() else 'done')
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, 'failed')
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        if status == 'done':
+            job.progress = 1.0
+        with self.lock:
+            self.finished[job.id] = None
+            while len(self.finished) > self.max_finished:
+                expired, _ = self.finished.popitem(last=False)
+                self.jobs.pop(expired, None)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_requested.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, 'cancelled')
+        return job
@@ -0,0 +1,207 @@
+from typing import List, Dict, Tuple, Optional, Callable
+import math
+import time
+from TimeTable import THEORY, LAB
+
+
+class LocalSearch:
+    """
+    Simulated annealing with a short tabu memory, run over a complete
+    timetable to improve its score.
+
+    Every move keeps the timetable valid under the section and room rules of
+    TimeTable.find_valid_slot: a theory session is relocated, theory sessions
+    of two sections trade their times and rooms, or a lab block moves to
+    another room or window. Moves are scored with the timetable's incremental
+    gap and distribution tables, and the best timetable seen is restored at
+    the end.
+    """
+
+    def __init__(self, timetable, max_iterations: int = 20000, time_limit: Optional[float] = None,
+                 temperature: float = 2.0, final_temperature: float = 0.01, tabu_tenure: int = 20,
+                 progress: Optional[Callable[[int, int], Optional[bool]]] = None):
+        self.tt = timetable
+        self.random = timetable.random
+        self.max_iterations = max_iterations
+        self.time_limit = time_limit
+        self.temperature = temperature
+        self.final_temperature = final_temperature
+        self.tabu_tenure = tabu_tenure
+        self.progress = progress
+        self.iterations = 0
+        self.accepted = 0
+        self.initial_score = timetable.score
+        self.best_score = timetable.score
+
+        # (section, course, day, hour) -> last iteration a session may not return there
+        self.tabu: Dict[Tuple[int, int, int, int], int] = {}
+
+    def is_tabu(self, sid: int, cid: int, day: int, hour: int, score: float) -> bool:
+        # Aspiration: a tabu window is allowed when it would beat the best score
+        return self.tabu.get((sid, cid, day, hour), -1) >= self.iterations and score <= self.best_score
+
+    def leave(self, placement: Tuple):
+        sid, cid, day, hour = placement[:4]
+        self.tabu[(sid, cid, day, hour)] = self.iterations + self.tabu_tenure
+
+    def relocation_options(self, placement: Tuple) -> List[Tuple[float, int, int, int]]:
+        # Valid (score after the move, day, hour, room bits) for the placement,
+        # which must be unplaced first
+        tt = self.tt
+        sid, cid, day, hour, duration, rid, slot_type = placement
+        room_bits = tt.allowed_rooms(sid, cid, slot_type == LAB)
+        options = []
+        for new_day in range(len(tt.days)):
+            # Lab sessions follow the daily rules of their theory course
+            starts = tt.section_starts(sid, tt.course_rule[cid], new_day, duration)
+            mask = tt.class_mask[sid][new_day]
+            room_windows = tt.free_rooms[duration][new_day]
+            for new_hour in range(tt.hours_per_day - duration + 1):
+                if not starts >> new_hour & 1:
+                    continue
+                rooms = room_windows[new_hour] & room_bits
+                if (new_day, new_hour) == (day, hour):
+                    # Staying put only makes sense for a lab changing rooms
+                    rooms = rooms & ~(1 << rid) if slot_type == LAB else 0
+                if not rooms:
+                    continue
+                score = tt.score + tt.score_delta(sid, new_day, mask | tt.window_masks[duration][new_hour])
+                if not self.is_tabu(sid, cid, new_day, new_hour, score):
+                    options.append((score, new_day, new_hour, rooms))
+        return options
+
+    def relocate(self, placement: Tuple, temperature: float) -> bool:
+        tt = self.tt
+        sid, cid, _, _, duration, _, slot_type = placement
+        before = tt.score
+        tt.unplace(placement)
+        options = self.relocation_options(placement)
+        if not options:
+            tt.place(*placement)
+            return False
+
+        # Half the moves go to the best window, the rest to a random one
+        if self.random.random() < 0.5:
+            best = max(option[0] for option in options)
+            options = [option for option in options if option[0] == best]
+        _, day, hour, rooms = self.random.choice(options)
+        moved = (sid, cid, day, hour, duration, tt.pick_room(rooms), slot_type)
+        tt.place(*moved)
+        if self.accept(tt.score - before, temperature):
+            self.leave(placement)
+            return True
+        tt.unplace(moved)
+        tt.place(*placement)
+        return False
+
+    def move_delta(self, sid: int, day: int, hour: int, new_day: int, new_hour: int) -> float:
+        # Score change when one of the section's class hours moves to a free hour
+        tt = self.tt
+        old, new = 1 << hour, 1 << new_hour
+        if day == new_day:
+            return tt.score_delta(sid, day, tt.class_mask[sid][day] & ~old | new)
+        return (tt.score_delta(sid, day, tt.class_mask[sid][day] & ~old) +
+                tt.score_delta(sid, new_day, tt.class_mask[sid][new_day] | new))
+
+    def swap(self, first: Tuple, second: Tuple, temperature: float) -> bool:
+        # Theory sessions of two sections trade their hours and rooms, which
+        # moves a class hour of each section
+        tt = self.tt
+        swapped_first = first[:2] + second[2:4] + (1, second[5], THEORY)
+        swapped_second = second[:2] + first[2:4] + (1, first[5], THEORY)
+        if not (tt.allowed_rooms(first[0], first[1], False) >> second[5] & 1 and
+                tt.allowed_rooms(second[0], second[1], False) >> first[5] & 1):
+            return False
+
+        delta = (self.move_delta(first[0], first[2], first[3], second[2], second[3]) +
+                 self.move_delta(second[0], second[2], second[3], first[2], first[3]))
+        score = tt.score + delta
+        if self.is_tabu(*swapped_first[:4], score) or self.is_tabu(*swapped_second[:4], score) or \
+                not self.accept(delta, temperature):
+            return False
+
+        # The rules are checked against the timetable without the two sessions;
+        # each then takes the room the other just left
+        tt.unplace(first)
+        tt.unplace(second)
+        if tt.section_starts(first[0], first[1], second[2], 1) >> second[3] & 1:
+            tt.place(*swapped_first)
+            if tt.section_starts(second[0], second[1], first[2], 1) >> first[3] & 1:
+                tt.place(*swapped_second)
+                self.leave(first)
+                self.leave(second)
+                return True
+            tt.unplace(swapped_first)
+        tt.place(*first)
+        tt.place(*second)
+        return False
+
+    def accept(self, delta: float, temperature: float) -> bool:
+        return delta >= 0 or self.random.random() < math.exp(delta / temperature)
+
+    def step(self, temperature: float) -> bool:
+        tt = self.tt
+        placement = self.random.choice(tt.placements)
+        if placement[6] == LAB:
+            return self.relocate(placement, temperature)
+        if placement[6] != THEORY:
+            return False
+        if self.random.random() < 0.5:
+            return self.relocate(placement, temperature)
+
+        # Partners: theory sessions of other sections at an hour this section
+        # has free, and the other way round
+        sid, _, day, hour = placement[:4]
+        partners = [other for other in tt.placements
+                    if other[0] != sid and other[6] == THEORY and
+                    not tt.class_mask[sid][other[2]] >> other[3] & 1 and
+                    not tt.class_mask[other[0]][day] >> hour & 1]
+        if not partners:
+            return self.relocate(placement, temperature)
+        return self.swap(placement, self.random.choice(partners), temperature)
+
+    def run(self) -> float:
+        """
+        Anneals until the iteration or time budget runs out, then restores the
+        best timetable seen and returns its score.
+        """
+        tt = self.tt
+        if not tt.placements:
+            return tt.score
+
+        start = time.monotonic()
+        best = tt.snapshot()
+        ratio = self.final_temperature / self.temperature
+        while self.iterations < self.max_iterations:
+            # Geometric cooling over whichever budget is closer to running out
+            elapsed = time.monotonic() - start
+            fraction = self.iterations / self.max_iterations
+            if self.time_limit is not None:
+                if elapsed > self.time_limit:
+                    break
+                fraction = max(fraction, elapsed / self.time_limit)
+            temperature = self.temperature * ratio ** fraction
+
+            if self.step(temperature):
+                self.accepted += 1
+                if tt.score > self.best_score:
+                    self.best_score = tt.score
+                    best = tt.snapshot()
+            self.iterations += 1
+
+            # Progress is reported every 1000 iterations; returning False stops the search
+            if self.progress and self.iterations % 1000 == 0:
+                if self.progress(self.iterations, self.max_iterations) is False:
+                    break
+
+        if tt.score < self.best_score:
+            tt.restore(best)
+        return self.best_score
+
+    def stats(self) -> Dict:
+        return {
+            'iterations': self.iterations,
+            'accepted': self.accepted,
+            'initial_score': self.initial_score,
+            'best_score': self.best_score
+        }
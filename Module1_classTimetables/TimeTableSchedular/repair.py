@@ -0,0 +1,207 @@
+from typing import List, Dict, Tuple, Optional, Set
+from TimeTable import THEORY, LAB
+
+
+class MinConflictsRepair:
+    """
+    Greedy construction that carries on past sessions it cannot place, then
+    repairs the partial timetable with min-conflicts.
+
+    An unplaced session goes to the (day, hour, room) that displaces the
+    fewest placed sessions; the displaced ones become unplaced in turn, until
+    every session is placed or the step budget runs out. Placed sessions always
+    satisfy every rule, so the conflicts are exactly the unplaced sessions.
+    """
+
+    def __init__(self, timetable, max_steps: int = 2000, tabu_tenure: int = 10,
+                 pinned: Optional[Set[Tuple]] = None):
+        self.tt = timetable
+        self.random = timetable.random
+        self.max_steps = max_steps
+        self.tabu_tenure = tabu_tenure
+        # Placements that may not be displaced, e.g. those kept by a warm start
+        self.pinned: Set[Tuple] = pinned or set()
+        self.steps = 0
+        # Unplaced sessions as (section, course, duration, slot type)
+        self.unplaced: List[Tuple[int, int, int, int]] = []
+        # Placements recently put in, which are not displaced again until this step
+        self.tabu: Dict[Tuple, int] = {}
+
+        # Who holds each (section | room | instructor, day, hour) cell
+        self.section_at: Dict[Tuple[int, int, int], Tuple] = {}
+        self.room_at: Dict[Tuple[int, int, int], Tuple] = {}
+        self.instructor_at: Dict[Tuple[int, int, int], Tuple] = {}
+        for placement in timetable.placements:
+            self.hold(placement, placement)
+
+    def hold(self, placement: Tuple, owner: Optional[Tuple]):
+        sid, cid, day, start_hour, duration, rid, _ = placement
+        iid = self.tt.instructor_of(sid, cid)
+        for hour in range(start_hour, start_hour + duration):
+            for cells, key in ((self.section_at, (sid, day, hour)), (self.room_at, (rid, day, hour)),
+                               (self.instructor_at, (iid, day, hour))):
+                if key[0] is None:
+                    continue
+                if owner is None:
+                    cells.pop(key, None)
+                else:
+                    cells[key] = owner
+
+    def place(self, placement: Tuple):
+        self.tt.place(*placement)
+        self.hold(placement, placement)
+
+    def unplace(self, placement: Tuple):
+        self.tt.unplace(placement)
+        self.hold(placement, None)
+
+    def construct(self):
+        # Same order as TimeTable.generate_timetable: labs first, then theory
+        tt = self.tt
+        for course, hours in tt.courses.items():
+            if hours['lab'] > 0:
+                for section in tt.sections:
+                    self.schedule(section, course, True)
+        for course, hours in tt.courses.items():
+            for section in tt.sections:
+                for _ in range(hours['theory']):
+                    self.schedule(section, course, False)
+
+    def schedule(self, section: str, course: str, is_lab: bool):
+        tt = self.tt
+        if tt.schedule_session(section, course, is_lab):
+            self.hold(tt.placements[-1], tt.placements[-1])
+        else:
+            cid = tt.course_id(f"{course}Lab" if is_lab else course)
+            self.unplaced.append((tt.section_ids[section], cid, 3 if is_lab else 1, LAB if is_lab else THEORY))
+
+    @staticmethod
+    def session(placement: Tuple) -> Tuple[int, int, int, int]:
+        sid, cid, _, _, duration, _, slot_type = placement
+        return sid, cid, duration, slot_type
+
+    def displaced(self, session: Tuple[int, int, int, int], day: int, hour: int
+                  ) -> Optional[Tuple[Set[Tuple], Optional[int]]]:
+        """
+        Placed sessions that must move for `session` to start at (day, hour),
+        and the room it would take (None to pick among the free rooms). None
+        when no eviction can make the window valid.
+        """
+        tt = self.tt
+        sid, cid, duration, slot_type = session
+        window = tt.window_masks[duration][hour]
+        if window & tt.break_mask:
+            return None
+        iid = tt.instructor_of(sid, cid)
+        if iid is not None and tt.instructor_unavailable[iid] & window:
+            return None
+
+        blockers = set()
+        for h in range(hour, hour + duration):
+            holder = self.section_at.get((sid, day, h))
+            if holder is not None:
+                blockers.add(holder)
+            if iid is not None:
+                holder = self.instructor_at.get((iid, day, h))
+                if holder is not None:
+                    blockers.add(holder)
+        if blockers & self.pinned:
+            return None
+
+        # Daily limit: lectures of the course that day beyond the maximum must go
+        rule = tt.course_rule[cid]
+        same_course = {holder for h in range(tt.hours_per_day)
+                       for holder in [self.section_at.get((sid, day, h))]
+                       if holder is not None and holder[1] == rule and holder not in blockers}
+        excess = len(same_course) - tt.max_daily_lectures + 1
+        if excess > 0:
+            movable = sorted(same_course - self.pinned)
+            if len(movable) < excess:
+                return None
+            blockers.update(self.random.sample(movable, excess))
+
+        room_bits = tt.allowed_rooms(sid, cid, slot_type == LAB)
+        if tt.free_rooms[duration][day][hour] & room_bits:
+            return blockers, None
+
+        # No free room: take the one whose occupants add the fewest evictions
+        best_room, best_extra = None, None
+        rooms = room_bits
+        while rooms:
+            lowest = rooms & -rooms
+            rid = lowest.bit_length() - 1
+            rooms ^= lowest
+            if tt.room_unavailable[rid] & window:
+                continue
+            extra = {self.room_at[(rid, day, h)] for h in range(hour, hour + duration)
+                     if (rid, day, h) in self.room_at} - blockers
+            if extra & self.pinned:
+                continue
+            if best_extra is None or len(extra) < len(best_extra):
+                best_room, best_extra = rid, extra
+        if best_room is None:
+            return None
+        return blockers | best_extra, best_room
+
+    def repair_step(self, session: Tuple[int, int, int, int]) -> bool:
+        tt = self.tt
+        sid, cid, duration, slot_type = session
+
+        # Least-conflicting windows, preferring those that leave recent moves alone
+        best, best_cost = [], None
+        for day in range(len(tt.days)):
+            for hour in range(tt.hours_per_day - duration + 1):
+                option = self.displaced(session, day, hour)
+                if option is None:
+                    continue
+                evicted = option[0]
+                cost = (any(self.tabu.get(p, -1) >= self.steps for p in evicted), len(evicted))
+                if best_cost is None or cost < best_cost:
+                    best, best_cost = [], cost
+                if cost == best_cost:
+                    best.append((day, hour, option))
+        if not best:
+            return False
+
+        day, hour, (evicted, rid) = self.random.choice(best)
+        for placement in evicted:
+            self.unplace(placement)
+
+        if rid is None:
+            rid = tt.pick_room(tt.free_rooms[duration][day][hour] & tt.allowed_rooms(sid, cid, slot_type == LAB))
+        valid = (tt.section_starts(sid, tt.course_rule[cid], day, duration) >> hour & 1 and
+                 tt.free_rooms[duration][day][hour] >> rid & 1)
+        if not valid:
+            # A rule the evictions could not fix, e.g. consecutive lectures: undo
+            for placement in evicted:
+                self.place(placement)
+            return False
+
+        placement = (sid, cid, day, hour, duration, rid, slot_type)
+        self.place(placement)
+        self.tabu[placement] = self.steps + self.tabu_tenure
+        self.unplaced.extend(self.session(placement) for placement in evicted)
+        return True
+
+    def solve(self) -> bool:
+        """
+        Builds the timetable greedily and repairs it. Returns True when every
+        session ends up placed within the step budget.
+        """
+        self.construct()
+        return self.repair()
+
+    def repair(self) -> bool:
+        """
+        Repairs the current timetable until the unplaced sessions are all
+        placed or the step budget runs out.
+        """
+        while self.unplaced and self.steps < self.max_steps:
+            session = self.unplaced.pop(self.random.randrange(len(self.unplaced)))
+            if not self.repair_step(session):
+                self.unplaced.append(session)
+            self.steps += 1
+        return not self.unplaced
+
+    def stats(self) -> Dict:
+        return {'steps': self.steps, 'unplaced': len(self.unplaced)}
@@ -0,0 +1,313 @@
+from typing import List, Dict, Tuple, Optional, Set, Callable
+import time
+from TimeTable import THEORY, LAB
+
+
+class BacktrackingSearch:
+    """
+    Systematic search over the same section and room rules as
+    TimeTable.find_valid_slot.
+
+    Every (section, course, session) is a variable whose domain is the set of
+    (day, hour, room) placements. Variables are picked most-constrained-first,
+    each placement forward-checks the domains it can shrink, and dead ends jump
+    straight back to the most recent placement that caused them.
+    """
+
+    def __init__(self, timetable, max_nodes: int = 100000, time_limit: Optional[float] = None,
+                 progress: Optional[Callable[[int, int], Optional[bool]]] = None):
+        self.tt = timetable
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.progress = progress
+        self.next_report = 1000
+        self.nodes = 0
+        self.num_days = len(timetable.days)
+        self.room_kinds = [timetable.theory_room_ids, timetable.lab_room_ids]
+
+        # Variables as parallel lists; kind 0 is theory, 1 is lab
+        self.var_section: List[int] = []
+        self.var_rule_course: List[int] = []
+        self.var_place_course: List[int] = []
+        self.var_kind: List[int] = []
+        self.var_group: List[int] = []
+        self.var_rooms: List[int] = []
+        self.section_vars: List[List[int]] = [[] for _ in timetable.sections]
+        self.kind_vars: List[List[int]] = [[], []]
+        self.group_vars: List[List[int]] = []
+        self.instructor_vars: Dict[int, List[int]] = {}
+
+        for course, hours in timetable.courses.items():
+            cid = timetable.course_id(course)
+            sessions = []
+            if hours['lab'] > 0:
+                sessions.append((timetable.course_id(f"{course}Lab"), 1, 1))
+            if hours['theory'] > 0:
+                sessions.append((cid, 0, hours['theory']))
+            for sid in range(len(timetable.sections)):
+                for place_course, kind, count in sessions:
+                    # Sessions of one group are interchangeable, so they are
+                    # kept in increasing (day, hour) order to avoid symmetric retries
+                    group = len(self.group_vars)
+                    self.group_vars.append([])
+                    for _ in range(count):
+                        var = len(self.var_section)
+                        self.var_section.append(sid)
+                        self.var_rule_course.append(cid)
+                        self.var_place_course.append(place_course)
+                        self.var_kind.append(kind)
+                        self.var_group.append(group)
+                        self.var_rooms.append(timetable.allowed_rooms(sid, place_course, bool(kind)))
+                        self.section_vars[sid].append(var)
+                        self.kind_vars[kind].append(var)
+                        self.group_vars[group].append(var)
+                        iid = timetable.instructor_of(sid, cid)
+                        if iid is not None:
+                            self.instructor_vars.setdefault(iid, []).append(var)
+
+        num_vars = len(self.var_section)
+        self.assignment: List[Optional[Tuple]] = [None] * num_vars
+        self.position: List[int] = [-1] * num_vars
+        self.order: List[int] = []
+
+        # Variables allowed the same rooms share their room supports:
+        # room_support[set][day] holds the start hours where one of the set's rooms is free
+        self.room_sets: List[Tuple[int, int]] = []
+        self.var_room_set: List[int] = []
+        self.room_set_vars: List[List[int]] = []
+        set_ids: Dict[Tuple[int, int], int] = {}
+        for var in range(num_vars):
+            key = (self.var_rooms[var], self.duration(var))
+            if key not in set_ids:
+                set_ids[key] = len(self.room_sets)
+                self.room_sets.append(key)
+                self.room_set_vars.append([])
+            self.var_room_set.append(set_ids[key])
+            self.room_set_vars[set_ids[key]].append(var)
+        self.room_support = [
+            [timetable.room_starts(bits, day, duration) for day in range(self.num_days)]
+            for bits, duration in self.room_sets
+        ]
+        # room_class[rid]: bit i set when the room is in room set i. Rooms of one class
+        # (same kind, capacity bucket and course lists) with the same occupancy are
+        # interchangeable for every variable
+        self.room_class = [
+            sum(1 << i for i, (bits, _) in enumerate(self.room_sets) if bits >> rid & 1)
+            for rid in range(len(timetable.rooms))
+        ]
+
+        # support[var][day]: start hours allowed by the section rules and some free room
+        # Counting bound: disjoint session windows still open in each room kind
+        full = (1 << timetable.hours_per_day) - 1
+        usable = full & ~timetable.break_mask
+        self.packing = [
+            [timetable.pack(mask & usable, 3 if kind else 1) for mask in range(full + 1)]
+            for kind in range(2)
+        ]
+        self.capacity = [
+            sum(self.packing[kind][~timetable.room_mask[rid][day] & full]
+                for rid in rooms for day in range(self.num_days))
+            for kind, rooms in enumerate(self.room_kinds)
+        ]
+        self.remaining = [len(self.kind_vars[0]), len(self.kind_vars[1])]
+
+        self.support = [[0] * self.num_days for _ in range(num_vars)]
+        self.domain_size = [0] * num_vars
+        for var in range(num_vars):
+            for day in range(self.num_days):
+                self.update_support(var, day)
+
+    def room_capacity(self, kind: int, rid: int, day: int) -> int:
+        full = (1 << self.tt.hours_per_day) - 1
+        return self.packing[kind][~self.tt.room_mask[rid][day] & full]
+
+    def duration(self, var: int) -> int:
+        return 3 if self.var_kind[var] else 1
+
+    def update_support(self, var: int, day: int):
+        mask = self.tt.section_starts(self.var_section[var], self.var_rule_course[var],
+                                      day, self.duration(var))
+        mask &= self.room_support[self.var_room_set[var]][day]
+        old = self.support[var][day]
+        if mask != old:
+            self.support[var][day] = mask
+            self.domain_size[var] += bin(mask).count('1') - bin(old).count('1')
+
+    def refresh(self, var: int, day: int, rid: int) -> Optional[int]:
+        """
+        Recompute the supports a placement or removal of `var` on `day` in
+        room `rid` can change. Returns an unassigned variable left with an
+        empty domain.
+        """
+        affected = set(self.section_vars[self.var_section[var]])
+        affected.update(self.instructor_vars.get(self.instructor(var), ()))
+        for room_set, (bits, duration) in enumerate(self.room_sets):
+            if bits >> rid & 1:
+                room_support = self.tt.room_starts(bits, day, duration)
+                if room_support != self.room_support[room_set][day]:
+                    self.room_support[room_set][day] = room_support
+                    affected.update(self.room_set_vars[room_set])
+
+        wiped = None
+        for other in affected:
+            if self.assignment[other] is None:
+                self.update_support(other, day)
+                if wiped is None and self.domain_size[other] == 0:
+                    wiped = other
+        return wiped
+
+    def instructor(self, var: int) -> Optional[int]:
+        return self.tt.instructor_of(self.var_section[var], self.var_rule_course[var])
+
+    def culprits(self, var: int) -> Set[int]:
+        # Assigned variables that can shrink var's domain: same section, room kind or instructor
+        section = self.var_section[var]
+        kind = self.var_kind[var]
+        instructor = self.instructor(var)
+        return {
+            other for other in self.order
+            if self.var_section[other] == section or self.var_kind[other] == kind
+            or (instructor is not None and self.instructor(other) == instructor)
+        }
+
+    def select_variable(self) -> Optional[int]:
+        best = None
+        best_size = None
+        for var, size in enumerate(self.domain_size):
+            if self.assignment[var] is None and (best is None or size < best_size):
+                best, best_size = var, size
+        return best
+
+    def candidates(self, var: int) -> List[Tuple[int, int, int]]:
+        tt = self.tt
+        duration = self.duration(var)
+
+        # Keep interchangeable sessions in increasing (day, hour) order
+        lower, upper = -1, self.num_days * tt.hours_per_day
+        index = self.group_vars[self.var_group[var]].index(var)
+        for i, sibling in enumerate(self.group_vars[self.var_group[var]]):
+            if self.position[sibling] >= 0:
+                if i < index:
+                    lower = max(lower, self.position[sibling])
+                elif i > index:
+                    upper = min(upper, self.position[sibling])
+
+        values = []
+        for day in range(self.num_days):
+            starts = self.support[var][day]
+            for hour in range(tt.hours_per_day):
+                if not starts >> hour & 1:
+                    continue
+                position = day * tt.hours_per_day + hour
+                if not lower < position < upper:
+                    continue
+                # Rooms of one class with the same occupancy on this day are interchangeable
+                rooms = tt.free_rooms[duration][day][hour] & self.var_rooms[var]
+                free_rooms = bin(rooms).count('1')
+                seen = {}
+                while rooms:
+                    lowest = rooms & -rooms
+                    rid = lowest.bit_length() - 1
+                    seen.setdefault((tt.room_mask[rid][day], self.room_class[rid]), rid)
+                    rooms ^= lowest
+                for rid in seen.values():
+                    values.append((day, hour, rid, free_rooms))
+
+        # Least-constraining first: windows with the most free rooms left
+        values.sort(key=lambda value: -value[3])
+        return [value[:3] for value in values]
+
+    def assign(self, var: int, value: Tuple[int, int, int]) -> Optional[int]:
+        day, hour, rid = value
+        kind = self.var_kind[var]
+        placement = (self.var_section[var], self.var_place_course[var], day, hour,
+                     self.duration(var), rid, LAB if kind else THEORY)
+        before = self.room_capacity(kind, rid, day)
+        self.tt.place(*placement)
+        self.capacity[kind] += self.room_capacity(kind, rid, day) - before
+        self.remaining[kind] -= 1
+        self.assignment[var] = placement
+        self.position[var] = day * self.tt.hours_per_day + hour
+        self.order.append(var)
+        self.nodes += 1
+
+        if self.remaining[kind] > self.capacity[kind]:
+            # Not enough room windows left for this kind: blame any open variable of it
+            return next(other for other in self.kind_vars[kind] if self.assignment[other] is None)
+        return self.refresh(var, day, rid)
+
+    def unassign(self, var: int):
+        placement = self.assignment[var]
+        kind = self.var_kind[var]
+        rid, day = placement[5], placement[2]
+        before = self.room_capacity(kind, rid, day)
+        self.tt.unplace(placement)
+        self.capacity[kind] += self.room_capacity(kind, rid, day) - before
+        self.remaining[kind] += 1
+        self.assignment[var] = None
+        self.position[var] = -1
+        self.order.remove(var)
+        self.refresh(var, day, rid)
+
+    def out_of_budget(self, deadline: Optional[float]) -> bool:
+        if self.nodes >= self.max_nodes:
+            return True
+        # Progress is reported every 1000 nodes; returning False stops the search
+        if self.progress and self.nodes >= self.next_report:
+            self.next_report += 1000
+            if self.progress(self.nodes, self.max_nodes) is False:
+                return True
+        return deadline is not None and time.monotonic() > deadline
+
+    def solve(self) -> Optional[bool]:
+        """
+        Returns True when every session is placed, False when the search space
+        is exhausted (no timetable exists) and None when the budget runs out.
+        """
+        deadline = time.monotonic() + self.time_limit if self.time_limit is not None else None
+
+        if any(size == 0 for size in self.domain_size):
+            return False
+        if any(self.remaining[kind] > self.capacity[kind] for kind in range(2)):
+            return False
+
+        var = self.select_variable()
+        if var is None:
+            return True
+
+        # Each frame holds the variable, its remaining values and its conflict set
+        stack = [[var, self.candidates(var), set()]]
+        while stack:
+            if self.out_of_budget(deadline):
+                return None
+
+            frame = stack[-1]
+            var, values, conflicts = frame
+            if self.assignment[var] is not None:
+                self.unassign(var)
+
+            if values:
+                wiped = self.assign(var, values.pop(0))
+                if wiped is not None:
+                    conflicts |= self.culprits(wiped) - {var}
+                    continue
+
+                next_var = self.select_variable()
+                if next_var is None:
+                    return True
+                stack.append([next_var, self.candidates(next_var), set()])
+                continue
+
+            # Dead end: jump back to the latest placement in the conflict set
+            conflicts |= self.culprits(var)
+            stack.pop()
+            while stack and stack[-1][0] not in conflicts:
+                self.unassign(stack[-1][0])
+                stack.pop()
+            if stack:
+                stack[-1][2] |= conflicts - {stack[-1][0]}
+
+        return False
+
+    def stats(self) -> Dict:
+        return {'nodes': self.nodes, 'variables': len(self.var_section)}
@@ -0,0 +1,238 @@
+from typing import Dict, List, Optional, Tuple, Iterator
+from collections import OrderedDict, Counter
+from contextlib import contextmanager
+import json
+import os
+import string
+import threading
+import time
+from TimeTable import TimeTable
+
+
+class TimeTableStore:
+    """
+    Keyed store of TimeTable instances with bounded memory.
+
+    The least recently used entries, and entries idle for longer than ttl
+    seconds, are spilled to `directory` as their compact state (input plus
+    assignment vector) and reloaded lazily on the next get(). Spilled files
+    older than disk_ttl seconds are discarded, when asked for and by a sweep
+    at startup and at most hourly after spills.
+
+    With a `database`, every stored or modified timetable is also saved
+    there, so evicted entries are simply dropped and rebuilt from it when
+    asked for again.
+
+    Handlers reach a timetable through use(), which serializes them per key
+    and pins the entry in memory, so a change is never lost to a spill made
+    while it was under way. The store lock only guards the entry table; disk
+    and database I/O happen outside it.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 64, max_bytes: int = 64 * 1024 * 1024,
+                 ttl: float = 1800, disk_ttl: float = 7 * 24 * 3600, database=None):
+        self.directory = directory
+        self.database = database
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_ttl = disk_ttl
+        # key -> (timetable, last access, approximate size)
+        self.entries: 'OrderedDict[str, Tuple[TimeTable, float, int]]' = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.RLock()
+        # Evicted (key, timetable) items whose state is still being written to disk
+        self.spilling: Dict[str, Tuple[str, TimeTable]] = {}
+        # Striped per-key locks held by use(), and how many users pin each key
+        self.key_locks = [threading.RLock() for _ in range(64)]
+        self.pins: Counter = Counter()
+        os.makedirs(directory, exist_ok=True)
+        self.swept = 0.0
+        self.sweep()
+
+    @staticmethod
+    def valid_key(key: str) -> bool:
+        return bool(key) and len(key) <= 64 and all(c in string.hexdigits for c in key)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def put(self, key: str, timetable: TimeTable):
+        if not self.valid_key(key):
+            raise ValueError(f"Invalid timetable id: {key}")
+        if self.database is not None:
+            self.database.save(key, timetable)
+        self.insert(key, timetable)
+
+    def insert(self, key: str, timetable: TimeTable):
+        with self.lock:
+            self._drop(key)
+            self.spilling.pop(key, None)
+            size = timetable.memory_footprint()
+            self.entries[key] = (timetable, time.monotonic(), size)
+            self.total_bytes += size
+            evicted = self.evict()
+        self.spill(evicted)
+
+    def get(self, key: str, pin: bool = False) -> Optional[TimeTable]:
+        if not self.valid_key(key):
+            return None
+        with self.lock:
+            if key in self.spilling:
+                # Evicted but not yet on disk: take it back
+                _, timetable = self.spilling.pop(key)
+                size = timetable.memory_footprint()
+                self.entries[key] = (timetable, time.monotonic(), size)
+                self.total_bytes += size
+            entry = self.entries.get(key)
+            if entry is not None:
+                timetable, _, size = entry
+                self.entries[key] = (timetable, time.monotonic(), size)
+                self.entries.move_to_end(key)
+                if pin:
+                    self.pins[key] += 1
+                evicted = self.evict()
+        if entry is not None:
+            self.spill(evicted)
+            return timetable
+
+        # Cold miss: read and rebuild outside the store lock
+        timetable = self.load(key)
+        if timetable is None and self.database is not None:
+            timetable = self.database.load(key)
+        if timetable is None:
+            return None
+        with self.lock:
+            # Another get() may have loaded the key meanwhile; keep the resident copy
+            if key in self.entries:
+                timetable = self.entries[key][0]
+            else:
+                size = timetable.memory_footprint()
+                self.entries[key] = (timetable, time.monotonic(), size)
+                self.total_bytes += size
+            if pin:
+                self.pins[key] += 1
+            evicted = self.evict()
+        self.spill(evicted)
+        return timetable
+
+    @contextmanager
+    def use(self, key: Optional[str]) -> Iterator[Optional[TimeTable]]:
+        # The timetable (None if unknown), locked against other users of the key
+        # and kept resident until the block ends
+        if not key or not self.valid_key(key):
+            yield None
+            return
+        with self.key_locks[hash(key) % len(self.key_locks)]:
+            timetable = self.get(key, pin=True)
+            try:
+                yield timetable
+            finally:
+                if timetable is not None:
+                    with self.lock:
+                        self.pins[key] -= 1
+                        if not self.pins[key]:
+                            del self.pins[key]
+
+    def touch(self, key: str, timetable: TimeTable):
+        # Re-measure an entry after it was modified in place; one that is no
+        # longer resident is stored again rather than losing the change
+        with self.lock:
+            entry = self.entries.get(key)
+            resident = entry is not None and entry[0] is timetable
+            evicted = []
+            if resident:
+                _, _, size = entry
+                new_size = timetable.memory_footprint()
+                self.entries[key] = (timetable, time.monotonic(), new_size)
+                self.total_bytes += new_size - size
+                evicted = self.evict()
+        self.spill(evicted)
+        if not resident:
+            self.put(key, timetable)
+        elif self.database is not None:
+            # Outside the store lock: use() already serializes changes to the key
+            self.database.save(key, timetable)
+
+    def evict(self) -> List[Tuple[str, TimeTable]]:
+        """
+        Drops idle entries, then least recently used ones until under both
+        limits, and returns them for spill() to write once the lock is released.
+        """
+        with self.lock:
+            now = time.monotonic()
+            evicted = []
+            # Pinned entries, in use by a handler, are never spilled
+            for key in [key for key, (_, accessed, _) in self.entries.items()
+                        if now - accessed > self.ttl and key not in self.pins]:
+                evicted.append((key, self._drop(key)))
+            # The most recent entry always stays resident, even if alone it is over max_bytes
+            while len(self.entries) > 1 and (len(self.entries) > self.max_entries or
+                                             self.total_bytes > self.max_bytes):
+                victim = next((key for key in self.entries if key not in self.pins), None)
+                if victim is None or victim == next(reversed(self.entries)):
+                    break
+                evicted.append((victim, self._drop(victim)))
+            if self.database is None:
+                # Reachable by get() until their files are written
+                self.spilling.update((item[0], item) for item in evicted)
+            return evicted
+
+    def spill(self, evicted: List[Tuple[str, TimeTable]]):
+        # The database already holds evicted timetables, so only files need writing
+        if self.database is not None or not evicted:
+            return
+        for item in evicted:
+            key, timetable = item
+            tmp_path = f"{self.path(key)}.tmp"
+            with open(tmp_path, 'w') as file:
+                json.dump(timetable.to_state(), file, separators=(',', ':'))
+            with self.lock:
+                # Unless get() took it back meanwhile, in which case the file is stale
+                if self.spilling.get(key) is item:
+                    os.replace(tmp_path, self.path(key))
+                    del self.spilling[key]
+                else:
+                    os.remove(tmp_path)
+        if time.time() - self.swept > min(self.disk_ttl, 3600):
+            self.sweep()
+
+    def sweep(self):
+        # Discard spilled files past disk_ttl, e.g. those of abandoned sessions
+        self.swept = time.time()
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                if self.swept - os.path.getmtime(os.path.join(self.directory, name)) > self.disk_ttl:
+                    os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def load(self, key: str) -> Optional[TimeTable]:
+        path = self.path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.disk_ttl:
+                os.remove(path)
+                return None
+            with open(path) as file:
+                state = json.load(file)
+            os.remove(path)
+        except (OSError, ValueError):
+            return None
+        return TimeTable.from_state(state)
+
+    def _drop(self, key: str) -> Optional[TimeTable]:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        self.total_bytes -= entry[2]
+        return entry[0]
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                'in_memory': len(self.entries),
+                'memory_bytes': self.total_bytes,
+                'on_disk': sum(1 for name in os.listdir(self.directory) if name.endswith('.json'))
+            }
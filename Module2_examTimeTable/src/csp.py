@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from collections import deque
 import pandas as pd
 
 def generate_valid_timeslots(start_date, end_date):
@@ -12,31 +13,91 @@ def generate_valid_timeslots(start_date, end_date):
         current_date += timedelta(days=1)
     return timeslots
 
+# How the timeslots of two related subjects must compare, as decided by is_valid_assignment
+ANY, DIFFERENT, SAME, NEVER = range(4)
+
+def compile_csp(domains, constraints, subjects):
+    # Integer form of the CSP: subject names become indexes, timeslots ordinal ids
+    # and each domain a bitset over those ids
+    names = list(domains)
+    index = {name: i for i, name in enumerate(names)}
+    slot_ids = {}
+    for domain in domains.values():
+        for ts in domain:
+            slot_ids.setdefault((ts['date'], ts['slot']), len(slot_ids))
+    bits = [sum(1 << slot_ids[(ts['date'], ts['slot'])] for ts in domains[name]) for name in names]
+
+    # is_valid_assignment looks up the first subject dict with each name
+    first = {}
+    for subject in subjects:
+        first.setdefault(subject['name'], subject)
+
+    def relate(name1, name2):
+        subject1, subject2 = first.get(name1), first.get(name2)
+        if subject1 is None or subject2 is None:
+            return NEVER
+        if subject1['department'] == subject2['department']:
+            return DIFFERENT
+        if name1 == name2:
+            return SAME
+        return ANY
+
+    # Relations both ways, since a pruned subject re-queues the arcs towards it
+    neighbours = [[] for _ in names]
+    arcs = set()
+    relation = {}
+    for name1, related in constraints.items():
+        a = index[name1]
+        for name2 in related:
+            b = index[name2]
+            if (a, b) in arcs:
+                continue
+            arcs.add((a, b))
+            neighbours[a].append(b)
+            relation[(a, b)] = relate(name1, name2)
+            relation.setdefault((b, a), relate(name2, name1))
+    return names, slot_ids, bits, neighbours, relation
+
+def revise(domain1, domain2, relation):
+    # Values of domain1 with a supporting value in domain2
+    if not domain2:
+        return 0
+    if relation == DIFFERENT:
+        # Any other timeslot supports a value, so only a single-value domain2 prunes
+        return domain1 if domain2 & (domain2 - 1) else domain1 & ~domain2
+    if relation == SAME:
+        return domain1 & domain2
+    if relation == ANY:
+        return domain1
+    return 0
+
 def enforce_arc_consistency(domains, constraints, subjects):
-    queue = []
-    for subject_name, related_subjects in constraints.items():
-        for related_subject in related_subjects:
-            queue.append((subject_name, related_subject))
+    names, slot_ids, bits, neighbours, relation = compile_csp(domains, constraints, subjects)
 
+    queue = deque((a, b) for a in range(len(names)) for b in neighbours[a])
+    queued = set(queue)
+    consistent = True
     while queue:
-        (subject1, subject2) = queue.pop(0)
-        removed = False
-        domain_copy = domains[subject1].copy()
-        
-        for ts1 in domain_copy:
-            if not any(is_valid_assignment(ts1, ts2, subject1, subject2, subjects) 
-                      for ts2 in domains[subject2]):
-                domains[subject1].remove(ts1)
-                removed = True
-                
-                for other_subject in constraints[subject1]:
-                    if other_subject != subject2:
-                        queue.append((other_subject, subject1))
-                        
-        if removed and len(domains[subject1]) == 0:
-            return False  # No valid assignments possible
-            
-    return True
+        arc = queue.popleft()
+        queued.discard(arc)
+        subject1, subject2 = arc
+        revised = revise(bits[subject1], bits[subject2], relation[arc])
+        if revised == bits[subject1]:
+            continue
+        bits[subject1] = revised
+        if not revised:
+            consistent = False  # No valid assignments possible
+            break
+        for other_subject in neighbours[subject1]:
+            if other_subject != subject2 and (other_subject, subject1) not in queued:
+                queue.append((other_subject, subject1))
+                queued.add((other_subject, subject1))
+
+    # Back to the timeslot lists, in place and in their original order
+    for name, domain_bits in zip(names, bits):
+        domains[name][:] = [ts for ts in domains[name]
+                            if domain_bits >> slot_ids[(ts['date'], ts['slot'])] & 1]
+    return consistent
 
 def is_valid_assignment(ts1, ts2, subject1_name, subject2_name, subjects):
     try:
@@ -10,61 +10,54 @@ class GeneticAlgorithm:
         self.mutation_rate = mutation_rate
         self.start_date = datetime.strptime(start_date, "%Y-%m-%d")
         self.end_date = datetime.strptime(end_date, "%Y-%m-%d")
-        self.population = [Individual(copy.deepcopy(initial_schedule)) for _ in range(population_size)]
+        self.population = [Individual(ExamSchedule(copy.deepcopy(initial_schedule))) for _ in range(population_size)]
+        self.dates = []
+        current = self.start_date
+        while current <= self.end_date:
+            self.dates.append(current.strftime("%Y-%m-%d"))
+            current += timedelta(days=1)
 
     def validate_schedule(self, schedule, batch_dept, date, timeslot):
         """
         Enhanced validation with stricter constraints including weekend checks
         """
         # First check if the date is a Sunday
-        check_date = datetime.strptime(date, "%Y-%m-%d")
-        if check_date.weekday() == 6:  # 6 represents Sunday (0 is Monday)
+        if is_sunday(date):
             return False
 
         proposed_batch, proposed_dept = batch_dept.split("_")
 
-        # Check all existing exams for conflicts
-        for key, exam in schedule.items():
-            exam_date = exam['date']
-            exam_timeslot = exam['timeslot']
-            current_batch, current_dept, _ = key.split("_")
-
-            # Rule 1: Same batch+department cannot have exams on same day
-            if current_batch == proposed_batch and current_dept == proposed_dept:
-                if exam_date == date:
-                    return False
-
-            # Rule 2: Same department cannot have overlapping timeslots on same day
-            if current_dept == proposed_dept and exam_date == date and exam_timeslot == timeslot:
-                return False
-
-        return True
+        # Rule 1: Same batch+department cannot have exams on same day
+        # Rule 2: Same department cannot have overlapping timeslots on same day
+        # Both are lookups in the schedule's indexes, built here for a plain dict
+        if not isinstance(schedule, ExamSchedule):
+            schedule = ExamSchedule(schedule)
+        return schedule.is_free(proposed_batch, proposed_dept, date, timeslot)
 
     def get_valid_slot(self, schedule, batch_dept):
         """
         Enhanced slot selection with better distribution
         """
         valid_slots = []
-        current = self.start_date
+        if not isinstance(schedule, ExamSchedule):
+            schedule = ExamSchedule(schedule)
         
         # Get all possible slots
-        while current <= self.end_date:
-            date_str = current.strftime("%Y-%m-%d")
+        for date_str in self.dates:
             for timeslot in ["10-12", "2-4"]:
                 if self.validate_schedule(schedule, batch_dept, date_str, timeslot):
-                    # Calculate how many exams are already on this date
-                    exams_on_date = sum(1 for exam in schedule.values() if exam['date'] == date_str)
+                    # How many exams are already on this date
+                    exams_on_date = schedule.date_counts[date_str]
                     # Add slot multiple times inversely proportional to number of exams
                     # This promotes better distribution
                     weight = max(1, 5 - exams_on_date)
                     for _ in range(weight):
                         valid_slots.append((date_str, timeslot))
-            current += timedelta(days=1)
         
         return random.choice(valid_slots) if valid_slots else None
 
     def crossover(self, parent1, parent2):
-        child_chromosome = {}
+        child_chromosome = ExamSchedule()
         keys = list(parent1.chromosome.keys())
         random.shuffle(keys)  # Randomize order to avoid bias
         
@@ -1,5 +1,78 @@
 import json
+import copy
+from collections import Counter
 from datetime import datetime   
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def is_sunday(date):
+    return datetime.strptime(date, "%Y-%m-%d").weekday() == 6
+
+class ExamSchedule(dict):
+    """
+    Chromosome dict (batch_dept_subject -> {'date', 'timeslot'}) that keeps
+    the indexes behind GeneticAlgorithm.validate_schedule up to date as exams
+    are placed and removed: exams per (batch, dept, date), per
+    (dept, date, timeslot) and per date.
+    """
+
+    def __init__(self, schedule=None):
+        super().__init__()
+        self.batch_dates = Counter()
+        self.dept_slots = Counter()
+        self.date_counts = Counter()
+        if schedule:
+            self.update(schedule)
+
+    def count(self, key, exam, step):
+        batch, dept = key.split("_")[:2]
+        self.batch_dates[(batch, dept, exam['date'])] += step
+        self.dept_slots[(dept, exam['date'], exam['timeslot'])] += step
+        self.date_counts[exam['date']] += step
+
+    def __setitem__(self, key, exam):
+        if key in self:
+            self.count(key, self[key], -1)
+        super().__setitem__(key, exam)
+        self.count(key, exam, 1)
+
+    def __delitem__(self, key):
+        self.count(key, self[key], -1)
+        super().__delitem__(key)
+
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+        exam = self[key]
+        del self[key]
+        return exam
+
+    def popitem(self):
+        key, exam = super().popitem()
+        self.count(key, exam, -1)
+        return key, exam
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, exam in dict(*args, **kwargs).items():
+            self[key] = exam
+
+    def clear(self):
+        super().clear()
+        self.batch_dates.clear()
+        self.dept_slots.clear()
+        self.date_counts.clear()
+
+    def __deepcopy__(self, memo):
+        return ExamSchedule({key: copy.deepcopy(exam, memo) for key, exam in self.items()})
+
+    def is_free(self, batch, dept, date, timeslot):
+        # Same batch+department on the date, or same department in the slot, is a conflict
+        return not self.batch_dates[(batch, dept, date)] and not self.dept_slots[(dept, date, timeslot)]
 
 class Individual:
     def __init__(self,chromosome):